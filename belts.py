@@ -0,0 +1,159 @@
+from collections import deque
+from config import *
+from gamedata import *
+from models import BELT_TYPES, ItemEntity
+ITEM_GAP = 0.25
+EPS = 1e-9
+NEIGHBORS = ((0, 0), (0, -1), (1, 0), (0, 1), (-1, 0))
+class Segment:
+    def __init__(self, tiles, direction, speed):
+        self.tiles = tiles
+        self.direction = direction
+        self.speed = speed
+        self.length = len(tiles)
+        dx, dy = direction.to_vector()
+        ex, ey = tiles[-1]
+        self.out = (ex + dx, ey + dy)
+        self.items = deque()
+        self.gaps = deque()
+        self.total = 0.0
+        self.slack = 1
+    def positions(self):
+        d = 0.0
+        for item_type, gap in zip(self.items, self.gaps):
+            d += gap
+            yield item_type, d
+    def insert(self, item_type, d):
+        if d < -EPS or d > self.length + EPS: return False
+        items, gaps = self.items, self.gaps
+        if not items or d >= self.total + ITEM_GAP - EPS:
+            items.append(item_type)
+            gaps.append(d - self.total)
+            self.total = d
+            return True
+        pos = 0.0
+        for k, gap in enumerate(gaps):
+            nxt = pos + gap
+            if d < nxt:
+                if k > 0 and d - pos < ITEM_GAP - EPS: return False
+                if nxt - d < ITEM_GAP - EPS: return False
+                items.insert(k, item_type)
+                gaps[k] = nxt - d
+                gaps.insert(k, d - pos)
+                self.slack = 1
+                return True
+            pos = nxt
+        return False
+    def _advance_lead(self):
+        gaps = self.gaps
+        d = min(self.speed, gaps[0])
+        gaps[0] -= d
+        if gaps[0] < EPS: gaps[0] = 0.0
+        self.total -= d
+    def step(self, world, network):
+        gaps = self.gaps
+        if gaps[0] > 0:
+            self._advance_lead()
+            return
+        if network.hand_off(world, self, self.items[0]):
+            if network.trail is not None: network.trail.append(self.tiles[-1])
+            self.items.popleft()
+            gaps.popleft()
+            self.slack = max(1, self.slack - 1)
+            if gaps: self._advance_lead()
+            else: self.total = 0.0
+            return
+        j, n = self.slack, len(gaps)
+        while j < n and gaps[j] <= ITEM_GAP + EPS: j += 1
+        self.slack = j
+        if j < n:
+            d = min(self.speed, gaps[j] - ITEM_GAP)
+            gaps[j] -= d
+            self.total -= d
+class BeltNetwork:
+    def __init__(self):
+        self.segments = {}
+        self.tile_map = {}
+        self.trail = None
+    def __len__(self): return sum(len(seg.items) for seg in self.segments)
+    def tick(self, world):
+        for seg in list(self.segments):
+            if seg.items: seg.step(world, self)
+    def insert(self, item_type, x, y):
+        entry = self.tile_map.get((x, y))
+        if not entry: return False
+        seg, i = entry
+        return seg.insert(item_type, seg.length - i - 0.5)
+    def hand_off(self, world, seg, item_type):
+        ox, oy = seg.out
+        if not (world.min_x <= ox < world.max_x and world.min_y <= oy < world.max_y): return False
+        entry = self.tile_map.get((ox, oy))
+        if entry:
+            nxt, i = entry
+            if i == 0 and nxt.direction == seg.direction: return nxt.insert(item_type, nxt.length)
+            return nxt.insert(item_type, nxt.length - i - 0.5)
+        return world.add_item(ItemEntity(item_type, ox, oy))
+    def add_tile(self, world, x, y): self._rebuild(world, x, y)
+    def remove_tile(self, world, x, y): self._rebuild(world, x, y)
+    def _rebuild(self, world, x, y):
+        affected = {(x, y)}
+        carried = []
+        for dx, dy in NEIGHBORS:
+            entry = self.tile_map.get((x + dx, y + dy))
+            if not entry or entry[0] not in self.segments: continue
+            seg = entry[0]
+            for item_type, d in seg.positions():
+                s = seg.length - d
+                idx = min(int(s), seg.length - 1)
+                carried.append((item_type, seg.tiles[idx], s - idx))
+            affected.update(seg.tiles)
+            del self.segments[seg]
+            for tile in seg.tiles: del self.tile_map[tile]
+        belts = {}
+        for tile in affected:
+            b = world.get_building_at(*tile)
+            if b and b.type in BELT_TYPES: belts[tile] = b
+        assigned = set()
+        def same(tile, b): return tile in belts and tile not in assigned and belts[tile].type == b.type and belts[tile].direction == b.direction
+        for tile in sorted(belts):
+            if tile in assigned: continue
+            b = belts[tile]
+            dx, dy = b.direction.to_vector()
+            head = tile
+            while same((head[0] - dx, head[1] - dy), b) and (head[0] - dx, head[1] - dy) != tile: head = (head[0] - dx, head[1] - dy)
+            run = [head]
+            assigned.add(head)
+            while same((run[-1][0] + dx, run[-1][1] + dy), b):
+                run.append((run[-1][0] + dx, run[-1][1] + dy))
+                assigned.add(run[-1])
+            seg = Segment(run, b.direction, b.data.get("speed", 0.1))
+            self.segments[seg] = None
+            for i, t in enumerate(run): self.tile_map[t] = (seg, i)
+        for item_type, tile, frac in carried:
+            entry = self.tile_map.get(tile)
+            if entry:
+                seg, i = entry
+                if seg.insert(item_type, seg.length - i - frac): continue
+            world.items.add(ItemEntity(item_type, *tile))
+    def restore(self, world, records):
+        self.segments, self.tile_map = {}, {}
+        for (hx, hy), length, items, gaps, total, slack in records:
+            b = world.get_building_at(hx, hy)
+            dx, dy = b.direction.to_vector()
+            seg = Segment([(hx + dx * i, hy + dy * i) for i in range(length)], b.direction, b.data.get("speed", 0.1))
+            seg.items.extend(items)
+            seg.gaps.extend(gaps)
+            seg.total, seg.slack = total, slack
+            self.segments[seg] = None
+            for i, t in enumerate(seg.tiles): self.tile_map[t] = (seg, i)
+    def render_positions(self):
+        types, xs, ys = [], [], []
+        for seg in self.segments:
+            hx, hy = seg.tiles[0]
+            dx, dy = seg.direction.to_vector()
+            for item_type, d in seg.positions():
+                s = seg.length - d - 0.5
+                types.append(item_type)
+                xs.append((hx + 0.5 + dx * s) * TILE_SIZE)
+                ys.append((hy + 0.5 + dy * s) * TILE_SIZE)
+        return types, xs, ys
\ No newline at end of file
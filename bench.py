@@ -0,0 +1,263 @@
+import argparse
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from config import *
+from gamedata import *
+from models import *
+PHASES = (
+    ("missions", World.update_mission_status),
+    ("buildings", World._tick_buildings),
+    ("items", World._tick_items),
+)
+ORES = [ItemType.IRON_ORE, ItemType.COPPER_ORE, ItemType.COAL_ORE, ItemType.WOOD]
+def build(world, b_type, x, y, direction=Direction.DOWN, res=None):
+    if res: world.set_tile_resource(x, y, res)
+    b = Building(b_type, x, y, direction)
+    if not world.can_place_building(x, y, b.width, b.height): return None
+    world.place_building(b)
+    return b
+def unlock_all(world):
+    world.min_x, world.min_y = 0, 0
+    world.max_x, world.max_y = world.max_width, world.max_height
+def scenario_starter(world):
+    x0, y0 = world.min_x, world.min_y
+    for i, res in enumerate(ORES):
+        build(world, BuildingType.MINER, x0 + i, y0 + 1, Direction.DOWN, res)
+    for x in range(x0, x0 + 7):
+        build(world, BuildingType.CONVEYOR, x, y0 + 2, Direction.RIGHT)
+    build(world, BuildingType.SELL_NODE, x0 + 7, y0 + 2)
+    build(world, BuildingType.MINER, x0, y0 + 4, Direction.RIGHT, ItemType.IRON_ORE)
+    for x in range(x0 + 1, x0 + 4):
+        build(world, BuildingType.CONVEYOR, x, y0 + 4, Direction.RIGHT)
+    smelter = build(world, BuildingType.SMELTER, x0 + 4, y0 + 4, Direction.RIGHT)
+    smelter.inv.add_item_to_slot(1, ItemType.COAL_ORE, 64)
+    for x in range(x0 + 5, x0 + 7):
+        build(world, BuildingType.CONVEYOR, x, y0 + 4, Direction.RIGHT)
+    build(world, BuildingType.BOX, x0 + 7, y0 + 4)
+    for x in range(x0, x0 + 3):
+        build(world, BuildingType.CONVEYOR, x, y0 + 6, Direction.RIGHT)
+    build(world, BuildingType.SPLITTER, x0 + 3, y0 + 6, Direction.RIGHT)
+    build(world, BuildingType.SELL_NODE, x0 + 3, y0 + 5)
+    build(world, BuildingType.SELL_NODE, x0 + 3, y0 + 7)
+    for _ in range(20): world.add_item(ItemEntity(ItemType.IRON_INGOT, x0, y0 + 6))
+def scenario_full(world):
+    unlock_all(world)
+    w, h = world.max_width, world.max_height
+    for y in range(0, h - 10):
+        row = y % 4
+        for x in range(w - 1):
+            if row == 0:
+                b_type = BuildingType.HEAVY_MINER if x % 3 == 0 else BuildingType.MINER
+                build(world, b_type, x, y, Direction.DOWN, ORES[(x + y) % len(ORES)])
+            elif row == 2:
+                smelter = build(world, BuildingType.SMELTER, x, y, Direction.DOWN)
+                smelter.inv.add_item_to_slot(0, ItemType.IRON_ORE if x % 2 else ItemType.COPPER_ORE, 64)
+                smelter.inv.add_item_to_slot(1, ItemType.COAL_ORE, 64)
+            elif x % 10 == 9:
+                build(world, BuildingType.CLASSIFIER, x, y, Direction.RIGHT)
+            else:
+                b_type = BuildingType.FAST_CONVEYOR if y % 8 == 3 else BuildingType.CONVEYOR
+                build(world, b_type, x, y, Direction.RIGHT)
+        build(world, BuildingType.SELL_NODE if row % 2 else BuildingType.BOX, w - 1, y)
+    world.current_research = "logistics"
+    recipes = list(ASSEMBLER_RECIPES)
+    for y in range(h - 10, h - 1, 3):
+        for x in range(0, w - 1, 3):
+            if (x // 3) % 4 == 3:
+                lab = build(world, BuildingType.LAB, x, y)
+                lab.inv.add_item_to_slot(0, ItemType.SCIENCE_PACK_1, 64)
+                continue
+            a = build(world, BuildingType.ASSEMBLER, x, y, Direction.DOWN)
+            a.recipe = recipes[(x // 3) % len(recipes)]
+            for i, req in enumerate(ASSEMBLER_RECIPES[a.recipe]["inputs"]):
+                a.inv.add_item_to_slot(i, req, 64)
+def scenario_saturated(world, count=600):
+    unlock_all(world)
+    w, h = world.max_width, world.max_height
+    loop = []
+    for k in range(0, min(w, h) // 2, 2):
+        x0, y0, x1, y1 = k, k, w - 1 - k, h - 1 - k
+        if x1 <= x0 or y1 <= y0: break
+        for x in range(x0, x1): loop.append((x, y0, Direction.RIGHT))
+        for y in range(y0, y1): loop.append((x1, y, Direction.DOWN))
+        for x in range(x1, x0, -1): loop.append((x, y1, Direction.LEFT))
+        for y in range(y1, y0, -1): loop.append((x0, y, Direction.UP))
+    for i, (x, y, d) in enumerate(loop):
+        build(world, BuildingType.FAST_CONVEYOR if i % 7 == 0 else BuildingType.CONVEYOR, x, y, d)
+    for i in range(count):
+        x, y, _ = loop[i % len(loop)]
+        world.add_item(ItemEntity(ORES[i % len(ORES)], x, y))
+SCENARIOS = {
+    "starter": scenario_starter,
+    "full": scenario_full,
+    "saturated": scenario_saturated,
+    "saturated_max": lambda world: scenario_saturated(world, MAX_ITEMS),
+}
+def make_world(name, seed, item_store=None, transport=None, crafting_timers=False, tile_capacity=None):
+    random.seed(seed)
+    world = World(item_store=item_store, transport=transport, crafting_timers=crafting_timers, tile_capacity=tile_capacity)
+    SCENARIOS[name](world)
+    return world
+def run(name, ticks, seed=0, memory=True, item_store=None, transport=None, crafting_timers=False, save_load=False, profile=False,
+        tile_capacity=None):
+    world = make_world(name, seed, item_store, transport, crafting_timers, tile_capacity)
+    phase_time = {p: 0.0 for p, _ in PHASES}
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(ticks):
+        for p, fn in PHASES:
+            t = clock()
+            fn(world)
+            phase_time[p] += clock() - t
+    elapsed = clock() - start
+    result = {
+        "scenario": name, "ticks": ticks, "seed": seed, "item_store": item_store or "object",
+        "transport": transport or "items", "crafting_timers": crafting_timers, "tile_capacity": tile_capacity,
+        "ticks_per_sec": ticks / elapsed if elapsed else float("inf"),
+        "ms_per_tick": elapsed * 1000 / ticks,
+        "phase_ms": {p: t * 1000 / ticks for p, t in phase_time.items()},
+        "realtime_ratio": (ticks / elapsed) / LOGIC_TICK_RATE if elapsed else float("inf"),
+        "items": len(world.items) + (len(world.belts) if world.belts is not None else 0),
+        "buildings": len(world.registry),
+        "money": world.money,
+    }
+    if save_load:
+        from savegame import save_world, load_world
+        buf = io.BytesIO()
+        t = clock()
+        save_world(world, buf)
+        result["save_ms"] = (clock() - t) * 1000
+        result["save_kb"] = buf.tell() / 1024
+        buf.seek(0)
+        t = clock()
+        load_world(buf, item_store, transport, crafting_timers, tile_capacity)
+        result["load_ms"] = (clock() - t) * 1000
+    if profile:
+        world = make_world(name, seed, item_store, transport, crafting_timers, tile_capacity)
+        prof = world.enable_profiling(window=ticks)
+        for _ in range(ticks): world.tick()
+        result["profile"] = prof.stats()
+    if memory:
+        tracemalloc.start()
+        world = make_world(name, seed, item_store, transport, crafting_timers, tile_capacity)
+        for _ in range(ticks): world.tick()
+        result["peak_mem_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+COLD_START = """
+import json, os, sys, time
+t0 = time.perf_counter()
+import models, planner, production, savegame, simloop
+out = {"sim_import_ms": (time.perf_counter() - t0) * 1000, "pygame_imported": "pygame" in sys.modules}
+t = time.perf_counter()
+world = models.World()
+out["world_ms"] = (time.perf_counter() - t) * 1000
+t = time.perf_counter()
+import pygame
+pygame.init()
+screen = pygame.display.set_mode((models.SCREEN_WIDTH, models.SCREEN_HEIGHT))
+out["display_ms"] = (time.perf_counter() - t) * 1000
+import render, resources
+t = time.perf_counter()
+for name in os.listdir(resources.ASSET_DIR):
+    if name.endswith(".png") and not resources.is_lazy(name): pygame.image.load(os.path.join(resources.ASSET_DIR, name))
+out["png_decode_ms"] = (time.perf_counter() - t) * 1000
+t = time.perf_counter()
+res = resources.ResourceManager()
+res.load_first_frame()
+cache = render.RenderCache(resources=res)
+cache.draw(screen, world, 0, 0)
+out["first_frame_ms"] = (time.perf_counter() - t) * 1000
+res.start_background()
+res.wait()
+out.update(res.timings)
+out["total_ms"] = (time.perf_counter() - t0) * 1000
+print(json.dumps(out))
+"""
+def time_cold_start():
+    import os
+    import subprocess
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, "-c", "import resources; resources.ensure_bundle()"], cwd=here, env=env, check=True)
+    proc = subprocess.run([sys.executable, "-c", COLD_START], cwd=here, env=env, check=True, capture_output=True, text=True)
+    r = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(f"[cold-start] sim import {r['sim_import_ms']:.0f}ms (pygame {'loaded' if r['pygame_imported'] else 'not loaded'}), world {r['world_ms']:.0f}ms, "
+          f"display {r['display_ms']:.0f}ms, first frame {r['first_frame_ms']:.0f}ms (bundle {r['bundle_ms']:.0f}ms, decode {r['decode_ms']:.0f}ms; "
+          f"PNG decode would be {r['png_decode_ms']:.0f}ms), background {r['background_ms']:.0f}ms, total {r['total_ms']:.0f}ms")
+    return r
+def time_mapgen(size, seed):
+    start = time.perf_counter()
+    world = World(width=size, height=size, seed=seed)
+    world.tiles.load_rect(0, 0, size, size)
+    elapsed = time.perf_counter() - start
+    print(f"[mapgen] {size}x{size} seed={seed}: {elapsed * 1000:.0f}ms, {len(world.tiles.chunks)} chunks, {sum(world.resource_index.totals.values())} resource tiles")
+def print_result(r):
+    phases = "  ".join(f"{p} {ms:.3f}ms" for p, ms in r["phase_ms"].items())
+    mem = f"  peak {r['peak_mem_kb']:.0f}KB" if "peak_mem_kb" in r else ""
+    if "save_ms" in r: mem += f"  save {r['save_ms']:.1f}ms load {r['load_ms']:.1f}ms ({r['save_kb']:.0f}KB)"
+    if "profile" in r:
+        p = r["profile"]
+        top = ", ".join(f"{t} {b['total_ms'] / p['ticks']:.3f}ms" for t, b in list(p["buildings"].items())[:3])
+        mem += f"  p50 {p['tick']['p50_ms']:.3f}ms p99 {p['tick']['p99_ms']:.3f}ms [{top}]"
+    print(f"[{r['scenario']}] {r['ticks_per_sec']:.0f} ticks/s ({r['ms_per_tick']:.3f}ms/tick, x{r['realtime_ratio']:.1f} realtime)  {phases}{mem}  items={r['items']} buildings={r['buildings']}")
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f: baseline = {r["scenario"]: r for r in json.load(f)}
+    failed = False
+    for r in results:
+        base = baseline.get(r["scenario"])
+        if not base: continue
+        ratio = r["ms_per_tick"] / base["ms_per_tick"]
+        status = "OK" if ratio <= 1 + tolerance else "REGRESSION"
+        if status != "OK": failed = True
+        print(f"  {r['scenario']}: {ratio:.2f}x baseline {status}")
+    return not failed
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="headless World.tick benchmark")
+    parser.add_argument("scenarios", nargs="*", help=f"any of: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--ticks", type=int, default=LOGIC_TICK_RATE * 60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--item-store", choices=["object", "array"], default="object")
+    parser.add_argument("--transport", choices=["items", "lanes", "stacks"], default="items")
+    parser.add_argument("--crafting-timers", action="store_true")
+    parser.add_argument("--tile-capacity", type=int, metavar="N", help="cap loose items per tile (off by default)")
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--save-load", action="store_true", help="also time save_world/load_world on the final state")
+    parser.add_argument("--profile", metavar="PATH", help="run once more with World profiling on and dump the stats as JSON")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare ms/tick against a previous --json dump")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--mapgen", type=int, metavar="SIZE", help="time seeded generation of a SIZE x SIZE map and exit")
+    parser.add_argument("--cold-start", action="store_true", help="time a fresh process from import to first drawn frame and exit")
+    args = parser.parse_args(argv)
+    if args.cold_start:
+        time_cold_start()
+        return 0
+    if args.mapgen:
+        time_mapgen(args.mapgen, args.seed)
+        return 0
+    for name in args.scenarios:
+        if name not in SCENARIOS: parser.error(f"unknown scenario: {name}")
+    results = []
+    for name in args.scenarios or list(SCENARIOS):
+        r = run(name, args.ticks, args.seed, memory=not args.no_memory,
+                item_store=None if args.item_store == "object" else args.item_store,
+                transport=None if args.transport == "items" else args.transport,
+                crafting_timers=args.crafting_timers, save_load=args.save_load, profile=bool(args.profile),
+                tile_capacity=args.tile_capacity)
+        print_result(r)
+        results.append(r)
+    if args.json:
+        with open(args.json, "w") as f: json.dump(results, f, indent=2)
+    if args.profile:
+        with open(args.profile, "w") as f: json.dump({r["scenario"]: r.pop("profile") for r in results}, f, indent=2)
+    if args.baseline and not compare(results, args.baseline, args.tolerance): return 1
+    return 0
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,4 +1,4 @@
-import pygame
+import os
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 TILE_SIZE = 40
@@ -6,7 +6,14 @@ GRID_WIDTH = 50
 GRID_HEIGHT = 50
 FPS = 60
 LOGIC_TICK_RATE = 30
-MAX_ITEMS = 600
+MAX_ITEMS = 20000
+ITEM_STACK_SIZE = 64
+RESOURCE_REGION_SIZE = 10
+CHUNK_SIZE = 32
+FAST_FORWARD_WINDOW = LOGIC_TICK_RATE * 60
+PROFILE_WINDOW = LOGIC_TICK_RATE * 10
+GAMEDATA_DEFAULT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gamedata.json")
+GAMEDATA_PATH = os.environ.get("GAMEDATA_PATH") or (GAMEDATA_DEFAULT if os.path.exists(GAMEDATA_DEFAULT) else None)
 PICKUP_RADIUS = 50
 COLOR_BG = (30, 30, 30)
 COLOR_GRID = (50, 50, 50)
@@ -1,3 +1,4 @@
+import json
 from enum import Enum
 from config import *
 class Direction(Enum):
@@ -5,9 +6,9 @@ class Direction(Enum):
     RIGHT = 1
     DOWN = 2
     LEFT = 3
-    def to_vector(self):
-        vectors = [(0, -1), (1, 0), (0, 1), (-1, 0)]
-        return vectors[self.value]
+    def to_vector(self): return self.vector
+DIRECTIONS = tuple(Direction)
+for d in DIRECTIONS: d.index, d.vector = d.value, ((0, -1), (1, 0), (0, 1), (-1, 0))[d.value]
 class ItemType(Enum):
     IRON_ORE = 1
     COPPER_ORE = 2
@@ -37,6 +38,12 @@ class ItemType(Enum):
     DIMIGO_TEACHER = 1002
     DIMIGO_PRINCIPAL = 1003
     DIMIGO_CHAIRMAN = 1004
+def read_data_file(path):
+    if not path: return {}
+    with open(path, encoding="utf-8") as f: return json.load(f)
+EXTRA_DATA = read_data_file(GAMEDATA_PATH)
+if EXTRA_DATA.get("items"):
+    ItemType = Enum("ItemType", {**{t.name: t.value for t in ItemType}, **{name: d["id"] for name, d in EXTRA_DATA["items"].items()}})
 ITEM_DATA = {
     ItemType.IRON_ORE: {"name": "철광석", "color": COLOR_IRON_ORE, "value": 2, "fuel_value": 0, "desc": "기본 광석", "tile_image": "iron_ore_patch.png"},
     ItemType.COPPER_ORE: {"name": "구리광석", "color": COLOR_COPPER_ORE, "value": 2, "fuel_value": 0, "desc": "전도성 광석", "tile_image": "copper_ore_patch.png"},
@@ -188,4 +195,27 @@ MISSION_DATA = {
         "rewards": { "money": 10000 },
         "unlocks": []
     },
-}
\ No newline at end of file
+}
+def merge_data(data):
+    for name, d in data.get("items", {}).items():
+        ITEM_DATA[ItemType[name]] = {k: tuple(v) if k == "color" else v for k, v in d.items() if k != "id"}
+    for name, r in data.get("smelter_recipes", {}).items():
+        SMELTER_RECIPES[ItemType[name]] = {"output": ItemType[r["output"]], "time": r["time"]}
+    for name, r in data.get("assembler_recipes", {}).items():
+        ASSEMBLER_RECIPES[ItemType[name]] = {"inputs": {ItemType[t]: n for t, n in r["inputs"].items()}, "time": r["time"],
+                                             "name": r.get("name", ITEM_DATA[ItemType[name]]["name"])}
+ITEM_TYPES, ITEM_VALUE, ITEM_FUEL, SMELTER_OUTPUT, SMELTER_TIME, RECIPE_INPUTS, RECIPE_TIME = [], [], [], [], [], [], []
+BUILDING_TYPES, BUILDING_SPEED = [], []
+def compile_tables():
+    ITEM_TYPES[:], BUILDING_TYPES[:] = ItemType, BuildingType
+    for i, t in enumerate(ITEM_TYPES): t.index = i
+    for i, t in enumerate(BUILDING_TYPES): t.index = i
+    ITEM_VALUE[:] = [ITEM_DATA.get(t, {}).get("value", 0) for t in ITEM_TYPES]
+    ITEM_FUEL[:] = [ITEM_DATA.get(t, {}).get("fuel_value", 0) for t in ITEM_TYPES]
+    SMELTER_OUTPUT[:] = [SMELTER_RECIPES[t]["output"] if t in SMELTER_RECIPES else None for t in ITEM_TYPES]
+    SMELTER_TIME[:] = [SMELTER_RECIPES[t]["time"] if t in SMELTER_RECIPES else 0 for t in ITEM_TYPES]
+    RECIPE_INPUTS[:] = [tuple(ASSEMBLER_RECIPES[t]["inputs"]) if t in ASSEMBLER_RECIPES else () for t in ITEM_TYPES]
+    RECIPE_TIME[:] = [ASSEMBLER_RECIPES[t]["time"] if t in ASSEMBLER_RECIPES else 0 for t in ITEM_TYPES]
+    BUILDING_SPEED[:] = [BUILDING_DATA[t].get("speed", 0.1) for t in BUILDING_TYPES]
+merge_data(EXTRA_DATA)
+compile_tables()
\ No newline at end of file
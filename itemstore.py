@@ -0,0 +1,168 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from config import *
+from gamedata import *
+ITEM_TYPES = list(ItemType)
+ITEM_CODES = {t: i for i, t in enumerate(ITEM_TYPES)}
+class ItemView:
+    __slots__ = ("store", "i", "uid")
+    count = 1
+    def __init__(self, store, i):
+        self.store, self.i = store, i
+        self.uid = int(store.uid[i])
+    def __eq__(self, other): return isinstance(other, ItemView) and other.store is self.store and other.i == self.i and other.uid == self.uid
+    def __hash__(self): return hash((self.i, self.uid))
+    @property
+    def type(self): return ITEM_TYPES[self.store.type[self.i]]
+    @property
+    def x(self): return int(self.store.x[self.i])
+    @property
+    def y(self): return int(self.store.y[self.i])
+    @property
+    def target_x(self): return int(self.store.tx[self.i])
+    @property
+    def target_y(self): return int(self.store.ty[self.i])
+    @property
+    def progress(self): return float(self.store.progress[self.i])
+    @property
+    def render_offset_x(self): return float(self.store.off_x[self.i])
+    @property
+    def render_offset_y(self): return float(self.store.off_y[self.i])
+    def get_render_pos(self):
+        rx = self.x + (self.target_x - self.x) * self.progress
+        ry = self.y + (self.target_y - self.y) * self.progress
+        return rx * TILE_SIZE + TILE_SIZE // 2 + self.render_offset_x, \
+               ry * TILE_SIZE + TILE_SIZE // 2 + self.render_offset_y
+class ArrayItemStore:
+    FIELDS = (("x", "int32"), ("y", "int32"), ("tx", "int32"), ("ty", "int32"), ("type", "int16"),
+              ("progress", "float64"), ("off_x", "float64"), ("off_y", "float64"), ("uid", "int64"),
+              ("alive", "bool"), ("asleep", "bool"))
+    def __init__(self, capacity=1024):
+        if np is None: raise ImportError("ArrayItemStore requires numpy")
+        self.capacity = capacity
+        for name, dtype in self.FIELDS: setattr(self, name, np.zeros(capacity, dtype))
+        self.n = 0
+        self.size = 0
+        self.free = []
+        self.next_uid = 0
+        self.trail = None
+        self.parked = {}
+    def _grow(self):
+        self.capacity *= 2
+        for name, dtype in self.FIELDS:
+            arr = np.zeros(self.capacity, dtype)
+            arr[:self.n] = getattr(self, name)[:self.n]
+            setattr(self, name, arr)
+    def __len__(self): return self.size
+    def _alive_indices(self):
+        idx = np.flatnonzero(self.alive[:self.n])
+        return idx[np.argsort(self.uid[idx], kind="stable")]
+    def __iter__(self):
+        for i in self._alive_indices().tolist(): yield ItemView(self, i)
+    def __contains__(self, item):
+        return isinstance(item, ItemView) and item.store is self and bool(self.alive[item.i]) and int(self.uid[item.i]) == item.uid
+    def add(self, item):
+        if self.free: i = self.free.pop()
+        else:
+            if self.n >= self.capacity: self._grow()
+            i = self.n
+            self.n += 1
+        self.x[i], self.y[i] = item.x, item.y
+        self.tx[i], self.ty[i] = item.target_x, item.target_y
+        self.type[i] = ITEM_CODES[item.type]
+        self.progress[i] = item.progress
+        self.off_x[i], self.off_y[i] = item.render_offset_x, item.render_offset_y
+        self.uid[i] = self.next_uid
+        self.next_uid += 1
+        self.alive[i], self.asleep[i] = True, False
+        self.size += 1
+        return ItemView(self, i)
+    def remove(self, item):
+        if item not in self: return False
+        self.alive[item.i] = False
+        self.free.append(item.i)
+        self.size -= 1
+        return True
+    def wake_tile(self, x, y):
+        n = self.n
+        self.asleep[:n][(self.x[:n] == x) & (self.y[:n] == y)] = False
+    def wake_parked(self, b):
+        parked = self.parked.pop(b, None)
+        if parked:
+            idx, uids = np.array(parked[0]), np.array(parked[1])
+            self.asleep[idx[self.alive[idx] & (self.uid[idx] == uids)]] = False
+    def _render_xy(self, idx):
+        p = self.progress[idx]
+        rx = self.x[idx] + (self.tx[idx] - self.x[idx]) * p
+        ry = self.y[idx] + (self.ty[idx] - self.y[idx]) * p
+        return rx * TILE_SIZE + TILE_SIZE // 2 + self.off_x[idx], ry * TILE_SIZE + TILE_SIZE // 2 + self.off_y[idx]
+    def in_rect(self, x0, y0, x1, y1):
+        idx = self._alive_indices()
+        x, y = self.x[idx], self.y[idx]
+        for i in idx[(x >= x0) & (x < x1) & (y >= y0) & (y < y1)].tolist(): yield ItemView(self, i)
+    def near(self, px, py, radius):
+        idx = self._alive_indices()
+        rx, ry = self._render_xy(idx)
+        for i in idx[(rx - px) ** 2 + (ry - py) ** 2 <= radius ** 2].tolist(): yield ItemView(self, i)
+    def _columns(self):
+        idx = self._alive_indices()
+        types = np.array(ITEM_TYPES, dtype=object)[self.type[idx]].tolist()
+        return idx, types, (self.x[idx].tolist(), self.y[idx].tolist(), self.tx[idx].tolist(), self.ty[idx].tolist(),
+                            self.progress[idx].tolist(), self.off_x[idx].tolist(), self.off_y[idx].tolist())
+    def state_rows(self):
+        idx, types, cols = self._columns()
+        return list(zip(self.uid[idx].tolist(), types, *cols, [1] * len(idx)))
+    def raw_positions(self):
+        idx, types, cols = self._columns()
+        return dict(zip(self.uid[idx].tolist(), zip(types, *cols)))
+    def render_positions(self):
+        idx = self._alive_indices()
+        rx, ry = self._render_xy(idx)
+        return np.array(ITEM_TYPES, dtype=object)[self.type[idx]], rx, ry
+    def advance(self, world):
+        n = self.n
+        x, y, tx, ty, progress = self.x[:n], self.y[:n], self.tx[:n], self.ty[:n], self.progress[:n]
+        rest = np.flatnonzero(self.alive[:n] & ~self.asleep[:n] & (progress == 0))
+        if len(rest):
+            rest = rest[np.argsort(self.uid[rest], kind="stable")]
+            route = world.route_item
+            retarget, new_tx, new_ty = [], [], []
+            launch, speeds, removed, sleeping, parking = [], [], [], [], []
+            for i, ix, iy, cur_tx, cur_ty, code in zip(rest.tolist(), x[rest].tolist(), y[rest].tolist(),
+                                                      tx[rest].tolist(), ty[rest].tolist(), self.type[rest].tolist()):
+                b, ntx, nty, speed, consumed = route(ITEM_TYPES[code], ix, iy)
+                if b:
+                    cur_tx, cur_ty = ntx, nty
+                    retarget.append(i); new_tx.append(ntx); new_ty.append(nty)
+                if consumed: removed.append(i)
+                elif cur_tx == ix and cur_ty == iy:
+                    if not b or b.parks_items: sleeping.append(i)
+                    elif hasattr(b, "inv"): parking.append((i, b))
+                else:
+                    launch.append(i); speeds.append(speed)
+            if retarget:
+                tx[retarget], ty[retarget] = new_tx, new_ty
+            if launch:
+                progress[launch] += np.array(speeds)
+                done = [i for i in launch if progress[i] >= 1.0]
+                if done:
+                    progress[done] = 0.0
+                    if self.trail is not None: self.trail.extend(zip(x[done].tolist(), y[done].tolist()))
+                    x[done], y[done] = tx[done], ty[done]
+            if removed:
+                self.alive[removed] = False
+                self.free.extend(removed)
+                self.size -= len(removed)
+            if sleeping: self.asleep[sleeping] = True
+            for i, b in parking:
+                self.asleep[i] = True
+                parked = self.parked.setdefault(b, ([], []))
+                parked[0].append(i); parked[1].append(int(self.uid[i]))
+        moving = self.alive[:n] & ((x != tx) | (y != ty))
+        progress[moving] += 0.1
+        arrived = moving & (progress >= 1.0)
+        progress[arrived] = 0.0
+        if self.trail is not None: self.trail.extend(zip(x[arrived].tolist(), y[arrived].tolist()))
+        x[arrived], y[arrived] = tx[arrived], ty[arrived]
\ No newline at end of file
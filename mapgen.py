@@ -0,0 +1,56 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from config import *
+from gamedata import *
+FIELDS = (
+    (ItemType.IRON_ORE, 9.0, 0.78, 0.7),
+    (ItemType.COPPER_ORE, 8.0, 0.8, 0.6),
+    (ItemType.COAL_ORE, 7.0, 0.8, 0.65),
+    (ItemType.WOOD, 11.0, 0.78, 0.8),
+)
+MIX1, MIX2 = 0xBF58476D1CE4E5B9, 0x94D049BB133111EB
+PRIME_X, PRIME_Y = 0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F
+class ChunkGenerator:
+    def __init__(self, seed=0):
+        if np is None: raise ImportError("ChunkGenerator requires numpy")
+        self.seed = seed
+    def _hash(self, xs, ys, layer):
+        with np.errstate(over="ignore"):
+            h = xs.astype(np.uint64) * np.uint64(PRIME_X) ^ ys.astype(np.uint64) * np.uint64(PRIME_Y)
+            h ^= np.uint64((self.seed * 1000003 + layer) & 0xFFFFFFFFFFFFFFFF)
+            h = (h ^ (h >> np.uint64(30))) * np.uint64(MIX1)
+            h = (h ^ (h >> np.uint64(27))) * np.uint64(MIX2)
+            h ^= h >> np.uint64(31)
+        return (h >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+    def _axis(self, coords, scale):
+        f = coords / scale
+        cell = np.floor(f).astype(np.int64)
+        t = f - cell
+        return cell, t * t * (3 - 2 * t)
+    def _noise(self, layer, scale, xs, ys):
+        ix, tx = self._axis(xs, scale)
+        iy, ty = self._axis(ys, scale)
+        lx, ly = np.arange(ix[0], ix[-1] + 2), np.arange(iy[0], iy[-1] + 2)
+        lattice = self._hash(lx[None, :], ly[:, None], layer)
+        ix, iy = ix - ix[0], (iy - iy[0])[:, None]
+        tx, ty = tx[None, :], ty[:, None]
+        top = lattice[iy, ix] * (1 - tx) + lattice[iy, ix + 1] * tx
+        bottom = lattice[iy + 1, ix] * (1 - tx) + lattice[iy + 1, ix + 1] * tx
+        return top * (1 - ty) + bottom * ty
+    def region(self, x0, y0, width, height):
+        xs, ys = np.arange(x0, x0 + width), np.arange(y0, y0 + height)
+        grain = self._hash(xs[None, :], ys[:, None], 0)
+        out = np.zeros((height, width), np.uint8)
+        for layer, (res, scale, threshold, chance) in enumerate(FIELDS, 1):
+            mask = (self._noise(layer, scale, xs, ys) > threshold) & (grain < chance) & (out == 0)
+            out[mask] = res.value
+        return out
+    def generate(self, cx, cy, size): return self.region(cx * size, cy * size, size, size).tobytes()
+    def generate_many(self, keys, size):
+        if not keys: return []
+        cx0, cy0 = min(cx for cx, _ in keys), min(cy for _, cy in keys)
+        cx1, cy1 = max(cx for cx, _ in keys) + 1, max(cy for _, cy in keys) + 1
+        area = self.region(cx0 * size, cy0 * size, (cx1 - cx0) * size, (cy1 - cy0) * size)
+        return [area[(cy - cy0) * size:(cy - cy0 + 1) * size, (cx - cx0) * size:(cx - cx0 + 1) * size].tobytes() for cx, cy in keys]
\ No newline at end of file
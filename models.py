@@ -1,59 +1,97 @@
+import heapq
 import random
-import pygame
 from config import *
 from gamedata import *
+from production import ProductionStats
 class ItemStack:
     def __init__(self, item_type, count=1):
         self.item_type = item_type
-        self.count = count
-        self.max_stack = 64
+        self._count = count
+        self.max_stack = ITEM_STACK_SIZE
+        self.owner = None
+        self.slot = None
+    @property
+    def count(self): return self._count
+    @count.setter
+    def count(self, value):
+        self._count = value
+        if self.owner: self.owner._recount(self.slot, self)
+class SlotList(list):
+    def __init__(self, inv, slots):
+        super().__init__(slots)
+        self.inv = inv
+    def __setitem__(self, i, stack):
+        if isinstance(i, slice):
+            super().__setitem__(i, stack)
+            self.inv._reindex()
+            return
+        if i < 0: i += len(self)
+        old = self[i]
+        if old is stack: return
+        if old: self.inv._untrack(i, old)
+        super().__setitem__(i, stack)
+        if stack: self.inv._track(i, stack)
+PLAYER_SLOT_ORDER = tuple(range(27, 36)) + tuple(range(0, 27))
 class Inventory:
-    def __init__(self, size):
+    def __init__(self, size, slot_order=None):
+        self.slot_order = tuple(slot_order) if slot_order else tuple(range(size))
+        self.rank = {i: r for r, i in enumerate(self.slot_order)}
+        self.on_change = None
         self.slots = [None] * size
+    @property
+    def slots(self): return self._slots
+    @slots.setter
+    def slots(self, slots):
+        self._slots = SlotList(self, slots)
+        self._reindex()
+    def _reindex(self):
+        self.counts = {}
+        self.by_type = {}
+        self.partial = {}
+        self.tracked = {}
+        self.free = set()
+        for i, stack in enumerate(self._slots):
+            if stack: self._track(i, stack, notify=False)
+            else: self.free.add(i)
+    def _changed(self, item_type):
+        if self.on_change: self.on_change(item_type)
+    def _track(self, i, stack, notify=True):
+        t = stack.item_type
+        stack.owner, stack.slot = self, i
+        self.tracked[i] = stack._count
+        self.counts[t] = self.counts.get(t, 0) + stack._count
+        self.by_type.setdefault(t, set()).add(i)
+        if stack._count < stack.max_stack: self.partial.setdefault(t, set()).add(i)
+        self.free.discard(i)
+        if notify: self._changed(t)
+    def _untrack(self, i, stack):
+        t = stack.item_type
+        if stack.owner is self and stack.slot == i: stack.owner = None
+        self.counts[t] -= self.tracked.pop(i)
+        self.by_type[t].discard(i)
+        if t in self.partial: self.partial[t].discard(i)
+        self.free.add(i)
+        self._changed(t)
+    def _recount(self, i, stack):
+        t = stack.item_type
+        self.counts[t] += stack._count - self.tracked[i]
+        self.tracked[i] = stack._count
+        if stack._count < stack.max_stack: self.partial.setdefault(t, set()).add(i)
+        elif t in self.partial: self.partial[t].discard(i)
+        self._changed(t)
     def add_item(self, item_type, count=1):
-        is_player_inv = len(self.slots) == 36
-        if is_player_inv:
-            hotbar_indices = range(27, 36)
-            main_inv_indices = range(0, 27)
-            for i in hotbar_indices:
-                stack = self.slots[i]
-                if stack and stack.item_type == item_type and stack.count < stack.max_stack:
-                    needed = stack.max_stack - stack.count
-                    added = min(needed, count)
-                    stack.count += added
-                    count -= added
-                    if count <= 0: return True
-            
-            for i in main_inv_indices:
-                stack = self.slots[i]
-                if stack and stack.item_type == item_type and stack.count < stack.max_stack:
-                    needed = stack.max_stack - stack.count
-                    added = min(needed, count)
-                    stack.count += added
-                    count -= added
-                    if count <= 0: return True
-            for i in hotbar_indices:
-                if not self.slots[i]:
-                    self.slots[i] = ItemStack(item_type, count)
-                    return True
-            for i in main_inv_indices:
-                if not self.slots[i]:
-                    self.slots[i] = ItemStack(item_type, count)
-                    return True
-        
-        else:
-            for stack in self.slots:
-                if stack and stack.item_type == item_type and stack.count < stack.max_stack:
-                    needed = stack.max_stack - stack.count
-                    added = min(needed, count)
-                    stack.count += added
-                    count -= added
-                    if count <= 0: return True
-            for i, stack in enumerate(self.slots):
-                if not stack:
-                    self.slots[i] = ItemStack(item_type, count)
-                    return True
-        
+        partial = self.partial.get(item_type)
+        if partial:
+            for i in sorted(partial, key=self.rank.__getitem__):
+                stack = self._slots[i]
+                added = min(stack.max_stack - stack.count, count)
+                stack.count += added
+                count -= added
+                if count <= 0: return True
+        if self.free:
+            i = min(self.free, key=self.rank.__getitem__)
+            self._slots[i] = ItemStack(item_type, count)
+            return True
         return False
     def add_stack(self, other_stack, slot_range=None):
         if slot_range is None: slot_range = range(len(self.slots))
@@ -83,9 +121,17 @@ class Inventory:
                 stack.count += count
                 return True
         return False
+    def room_for(self, item_type):
+        room = sum(ITEM_STACK_SIZE - self._slots[i]._count for i in self.partial.get(item_type, ()))
+        return room + ITEM_STACK_SIZE if self.free else room
+    def slot_room(self, slot_idx, item_type):
+        stack = self.slots[slot_idx]
+        if not stack: return ITEM_STACK_SIZE
+        return stack.max_stack - stack.count if stack.item_type == item_type else 0
     def has_items(self, req_dict):
+        counts = self.counts
         for req_type, req_count in req_dict.items():
-            if self.count_items(req_type) < req_count: return False
+            if counts.get(req_type, 0) < req_count: return False
         return True
     def remove_items(self, req_dict):
         if not self.has_items(req_dict): return False
@@ -93,16 +139,15 @@ class Inventory:
             self.remove_item(req_type, req_count)
         return True
     def remove_item(self, item_type, count=1):
-        total = self.count_items(item_type)
-        if total < count: return False
+        if self.counts.get(item_type, 0) < count: return False
         removed = 0
-        for i, stack in enumerate(self.slots):
-            if stack and stack.item_type == item_type:
-                take = min(count - removed, stack.count)
-                stack.count -= take
-                removed += take
-                if stack.count <= 0: self.slots[i] = None
-                if removed >= count: return True
+        for i in sorted(self.by_type.get(item_type, ())):
+            stack = self._slots[i]
+            take = min(count - removed, stack.count)
+            stack.count -= take
+            removed += take
+            if stack.count <= 0: self._slots[i] = None
+            if removed >= count: return True
         return False
     def remove_from_slot(self, slot_idx, count=1):
         if 0 <= slot_idx < len(self.slots) and self.slots[slot_idx]:
@@ -113,15 +158,19 @@ class Inventory:
                 return True
         return False
     def count_items(self, item_type):
-        return sum(s.count for s in self.slots if s and s.item_type == item_type)
+        return self.counts.get(item_type, 0)
 class ItemEntity:
-    def __init__(self, item_type, x, y):
+    def __init__(self, item_type, x, y, offset=None):
         self.type = item_type
         self.x, self.y = x, y
         self.target_x, self.target_y = x, y
         self.progress = 0.0
-        self.render_offset_x = random.uniform(-5, 5)
-        self.render_offset_y = random.uniform(-5, 5)
+        self.uid = 0
+        self.count = 1
+        if offset: self.render_offset_x, self.render_offset_y = offset
+        else:
+            self.render_offset_x = random.uniform(-5, 5)
+            self.render_offset_y = random.uniform(-5, 5)
     def update(self, speed):
         if self.x != self.target_x or self.y != self.target_y:
             self.progress += speed
@@ -135,7 +184,280 @@ class ItemEntity:
         ry = self.y + (self.target_y - self.y) * self.progress
         return rx * TILE_SIZE + TILE_SIZE // 2 + self.render_offset_x, \
                ry * TILE_SIZE + TILE_SIZE // 2 + self.render_offset_y
+BELT_TYPES = (BuildingType.CONVEYOR, BuildingType.FAST_CONVEYOR)
+MAX_MINER_RADIUS = max(d.get("radius", 0) for d in BUILDING_DATA.values())
+STARTER_RESOURCES = (ItemType.IRON_ORE, ItemType.COPPER_ORE, ItemType.COAL_ORE, ItemType.WOOD)
+class ItemIndex:
+    def __init__(self, capacity=None, stacking=False):
+        self.tiles = {}
+        self.active = {}
+        self.size = 0
+        self.next_uid = 0
+        self.trail = None
+        self.capacity = capacity
+        self.claims = {}
+        self.blocked = {}
+        self.unblocked = []
+        self.stalled = {}
+        self.restarted = []
+        self.parked = {}
+        self.stacking = stacking
+        self.rows = None
+        self.settled = {}
+    def __len__(self): return self.size
+    def __iter__(self):
+        for bucket in list(self.tiles.values()): yield from list(bucket)
+    def __contains__(self, item): return item in self.tiles.get((item.x, item.y), ())
+    def add(self, item):
+        item.uid = self.next_uid
+        self.next_uid += 1
+        self.tiles.setdefault((item.x, item.y), {})[item] = None
+        self.active[item] = None
+        self.size += 1
+        if self.capacity is not None: self._reserve(item, 1)
+        if self.rows is not None: self.settled[item] = None
+    def remove(self, item):
+        key = (item.x, item.y)
+        bucket = self.tiles.get(key)
+        if bucket is None or item not in bucket: return False
+        if self.capacity is not None: self._reserve(item, -1)
+        del bucket[item]
+        if not bucket: del self.tiles[key]
+        self.active.pop(item, None)
+        self.size -= 1
+        if self.rows is not None:
+            self.rows.pop(item.uid, None)
+            self.settled.pop(item, None)
+        if self.capacity is not None: self._vacated((item.target_x, item.target_y))
+        return True
+    def move(self, item, old_x, old_y):
+        if self.trail is not None: self.trail.append((old_x, old_y))
+        old = self.tiles[(old_x, old_y)]
+        del old[item]
+        if not old: del self.tiles[(old_x, old_y)]
+        self.tiles.setdefault((item.x, item.y), {})[item] = None
+        if self.stacking and self.merge(item.x, item.y, item.type, item.count, item): self.remove(item)
+    def merge(self, x, y, item_type, count, skip=None):
+        for other in self.tiles.get((x, y), ()):
+            if other is not skip and other.type is item_type and other.progress == 0 and other.target_x == x \
+                    and other.target_y == y and other.count + count <= ITEM_STACK_SIZE:
+                other.count += count
+                return True
+        return False
+    def _vacated(self, key):
+        waiting = self.blocked.pop(key, None)
+        if waiting: self.unblocked.extend(waiting)
+        self.wake_stalled(key)
+    def wake_stalled(self, key):
+        producers = self.stalled.pop(key, None)
+        if producers: self.restarted.extend(producers)
+    def _wake_unblocked(self):
+        if self.unblocked:
+            self.wake([i for i in self.unblocked if i in self])
+            self.unblocked.clear()
+    def _reserve(self, item, n):
+        key = (item.target_x, item.target_y)
+        n += self.claims.get(key, 0)
+        if n: self.claims[key] = n
+        else: del self.claims[key]
+    def has_room(self, x, y):
+        if self.capacity is None: return True
+        return self.claims.get((x, y), 0) < self.capacity
+    def sleep(self, item):
+        self.active.pop(item, None)
+        if self.rows is not None: self.settled[item] = None
+    def wake(self, items):
+        woken = [i for i in items if i not in self.active]
+        if not woken: return
+        self.active = dict.fromkeys(sorted([*self.active, *woken], key=lambda i: i.uid))
+    def wake_tile(self, x, y): self.wake(self.tiles.get((x, y), ()))
+    def park(self, item, b):
+        self.parked.setdefault(b, {})[item] = None
+        self.sleep(item)
+    def wake_parked(self, b):
+        items = self.parked.pop(b, None)
+        if items: self.wake([i for i in items if i in self])
+    def advance(self, world):
+        items_to_remove = []
+        capped = self.capacity is not None
+        if capped: self._wake_unblocked()
+        for item in list(self.active):
+            if item.progress > 0: continue
+            ix, iy = int(item.x), int(item.y)
+            if self.stacking:
+                if not self._route_stack(world, item, ix, iy): items_to_remove.append(item)
+                continue
+            b, tx, ty, speed, consumed = world.route_item(item.type, ix, iy)
+            if not b: pass
+            elif not capped: item.target_x, item.target_y = tx, ty
+            elif not consumed and (tx != item.target_x or ty != item.target_y):
+                if (tx != ix or ty != iy) and not self.has_room(tx, ty):
+                    self.blocked.setdefault((tx, ty), {})[item] = None
+                    self.sleep(item)
+                    continue
+                old = (item.target_x, item.target_y)
+                self._reserve(item, -1)
+                item.target_x, item.target_y = tx, ty
+                self._reserve(item, 1)
+                self._vacated(old)
+            if consumed:
+                items_to_remove.append(item)
+                continue
+            if item.target_x == ix and item.target_y == iy:
+                if not b or b.parks_items: self.sleep(item)
+                elif hasattr(b, "inv"): self.park(item, b)
+                continue
+            item.update(speed)
+        for item in items_to_remove: self.remove(item)
+        for item in list(self.active):
+            if item.x == item.target_x and item.y == item.target_y: continue
+            item.progress += 0.1
+            if item.progress >= 1.0:
+                x, y = item.x, item.y
+                item.progress = 0.0
+                item.x, item.y = item.target_x, item.target_y
+                self.move(item, x, y)
+    def _route_stack(self, world, item, ix, iy):
+        b, routes, taken = world.route_stack(item.type, item.count, ix, iy)
+        if taken == item.count: return False
+        item.count -= taken
+        for tx, ty, speed, n in routes[1:]:
+            split = ItemEntity(item.type, ix, iy, (item.render_offset_x, item.render_offset_y))
+            split.count, split.target_x, split.target_y = n, tx, ty
+            item.count -= n
+            self.add(split)
+            split.update(speed)
+        tx, ty, speed, _ = routes[0]
+        if b: item.target_x, item.target_y = tx, ty
+        if item.target_x != ix or item.target_y != iy: item.update(speed)
+        elif not b or b.parks_items: self.sleep(item)
+        elif hasattr(b, "inv"): self.park(item, b)
+        return True
+    def state_rows(self):
+        return [(i.uid, i.type, i.x, i.y, i.target_x, i.target_y, i.progress, i.render_offset_x, i.render_offset_y, i.count)
+                for bucket in self.tiles.values() for i in bucket]
+    def raw_positions(self):
+        if self.rows is None: self.rows, changed = {}, self
+        else: changed = (*self.active, *self.settled)
+        rows = self.rows
+        for i in changed: rows[i.uid] = (i.type, i.x, i.y, i.target_x, i.target_y, i.progress, i.render_offset_x, i.render_offset_y)
+        self.settled.clear()
+        return dict(rows)
+    def at(self, x, y): return list(self.tiles.get((x, y), ()))
+    def in_rect(self, x0, y0, x1, y1):
+        if (x1 - x0) * (y1 - y0) < len(self.tiles):
+            for y in range(y0, y1):
+                for x in range(x0, x1):
+                    bucket = self.tiles.get((x, y))
+                    if bucket: yield from list(bucket)
+        else:
+            for (x, y), bucket in list(self.tiles.items()):
+                if x0 <= x < x1 and y0 <= y < y1: yield from list(bucket)
+    def near(self, px, py, radius):
+        r = int(radius // TILE_SIZE) + 2
+        tx, ty = int(px // TILE_SIZE), int(py // TILE_SIZE)
+        for item in self.in_rect(tx - r, ty - r, tx + r + 1, ty + r + 1):
+            ix, iy = item.get_render_pos()
+            if (ix - px) ** 2 + (iy - py) ** 2 <= radius ** 2: yield item
+    def render_positions(self):
+        types, xs, ys = [], [], []
+        for bucket in self.tiles.values():
+            for item in bucket:
+                rx, ry = item.get_render_pos()
+                types.append(item.type); xs.append(rx); ys.append(ry)
+        return types, xs, ys
+TILE_TYPES = [None] * 256
+for _t in ItemType:
+    if _t.value < 256: TILE_TYPES[_t.value] = _t
+class TileGrid:
+    def __init__(self, width, height, chunk_size=CHUNK_SIZE, generator=None):
+        self.width, self.height = width, height
+        self.chunk_size = chunk_size
+        self.generator = generator
+        self.chunks = {}
+        self.on_generate = None
+    def chunk(self, cx, cy):
+        data = self.chunks.get((cx, cy))
+        if data is None:
+            n = self.chunk_size
+            data = self._store(cx, cy, self.generator.generate(cx, cy, n) if self.generator else bytes(n * n))
+        return data
+    def _store(self, cx, cy, data):
+        n = self.chunk_size
+        data = bytearray(data)
+        x0, y0 = cx * n, cy * n
+        if x0 + n > self.width or y0 + n > self.height:
+            for k in range(n * n):
+                if x0 + k % n >= self.width or y0 + k // n >= self.height: data[k] = 0
+        self.chunks[(cx, cy)] = data
+        if self.on_generate: self.on_generate(cx, cy, data)
+        return data
+    def get(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height): return None
+        n = self.chunk_size
+        data = self.chunks.get((x // n, y // n))
+        if data is None:
+            if not self.generator: return None
+            data = self.chunk(x // n, y // n)
+        return TILE_TYPES[data[(y % n) * n + x % n]]
+    def set(self, x, y, res):
+        n = self.chunk_size
+        self.chunk(x // n, y // n)[(y % n) * n + x % n] = res.value if res else 0
+    def load_rect(self, x0, y0, x1, y1):
+        if not self.generator: return
+        n = self.chunk_size
+        missing = [(cx, cy) for cy in range(max(0, y0) // n, (min(y1, self.height) - 1) // n + 1)
+                   for cx in range(max(0, x0) // n, (min(x1, self.width) - 1) // n + 1) if (cx, cy) not in self.chunks]
+        for (cx, cy), data in zip(missing, self.generator.generate_many(missing, n)): self._store(cx, cy, data)
+class ResourceIndex:
+    def __init__(self, region_size=RESOURCE_REGION_SIZE):
+        self.region_size = region_size
+        self.regions = {}
+        self.totals = {}
+    def rebuild(self, tiles):
+        self.regions, self.totals = {}, {}
+        for (cx, cy), data in tiles.chunks.items(): self.add_chunk(cx, cy, data, tiles.chunk_size)
+    def add_chunk(self, cx, cy, data, n):
+        size = self.region_size
+        x0, y0 = cx * n, cy * n
+        cuts = [x0] + list(range((x0 // size + 1) * size, x0 + n, size)) + [x0 + n]
+        rows = [y0] + list(range((y0 // size + 1) * size, y0 + n, size)) + [y0 + n]
+        for ya, yb in zip(rows, rows[1:]):
+            for xa, xb in zip(cuts, cuts[1:]):
+                block = b"".join(data[(y - y0) * n + xa - x0:(y - y0) * n + xb - x0] for y in range(ya, yb))
+                for code in set(block):
+                    if code: self.add(xa, ya, TILE_TYPES[code], block.count(code))
+    def add(self, x, y, res, count=1):
+        region = self.regions.setdefault((x // self.region_size, y // self.region_size), {})
+        region[res] = region.get(res, 0) + count
+        self.totals[res] = self.totals.get(res, 0) + count
+        if region[res] <= 0: del region[res]
+        if self.totals[res] <= 0: del self.totals[res]
+    def remove(self, x, y, res): self.add(x, y, res, -1)
+    def region_counts(self, rx, ry): return dict(self.regions.get((rx, ry), {}))
+    def count_in(self, tiles, x0, y0, x1, y1):
+        size = self.region_size
+        counts = {}
+        for ry in range(y0 // size, (y1 - 1) // size + 1):
+            for rx in range(x0 // size, (x1 - 1) // size + 1):
+                region = self.regions.get((rx, ry))
+                if not region: continue
+                bx0, by0 = rx * size, ry * size
+                if x0 <= bx0 and y0 <= by0 and bx0 + size <= x1 and by0 + size <= y1:
+                    for res, n in region.items(): counts[res] = counts.get(res, 0) + n
+                    continue
+                for y in range(max(y0, by0), min(y1, by0 + size)):
+                    for x in range(max(x0, bx0), min(x1, bx0 + size)):
+                        res = tiles.get(x, y)
+                        if res: counts[res] = counts.get(res, 0) + 1
+        return counts
 class Building:
+    __slots__ = ("type", "gx", "gy", "direction", "data", "width", "height", "timer", "seq",
+                 "timed_at", "timed_rate", "timed_token", "timed_world")
+    ticking = False
+    parks_items = False
+    def __new__(cls, b_type, *args, **kwargs):
+        return object.__new__(BUILDING_CLASSES[b_type] if cls is Building else cls)
     def __init__(self, b_type, gx, gy, direction=Direction.DOWN):
         self.type = b_type
         self.gx, self.gy = gx, gy
@@ -143,133 +465,311 @@ class Building:
         self.data = BUILDING_DATA[b_type]
         self.width, self.height = self.data["size"]
         self.timer = 0
-        
-        if self.type == BuildingType.BOX:
-            self.inv = Inventory(27)
-        elif self.type == BuildingType.SMELTER:
-            self.inv = Inventory(3)
-            self.fuel_left, self.max_fuel_time, self.progress = 0, 1, 0
-        elif self.type == BuildingType.SPLITTER:
-            self.out_index = 0
-        elif self.type == BuildingType.ASSEMBLER:
-            self.inv = Inventory(5)
-            self.recipe = None
-            self.progress = 0
-        elif self.type == BuildingType.LAB:
-            self.inv = Inventory(1) 
-            self.progress = 0 
-            self.active = False
-            
-        elif self.type == BuildingType.CLASSIFIER:
-            self.filter_item_type = None
-            self.match_direction_offset = 1
-            self.no_match_direction_offset = 0
+        self.seq = 0
+        self.timed_at = None
+        self.timed_rate = 0
+        self.timed_token = 0
+        self.timed_world = None
     def get_rect(self):
+        import pygame
         return pygame.Rect(self.gx * TILE_SIZE, self.gy * TILE_SIZE, self.width * TILE_SIZE, self.height * TILE_SIZE)
+    def get_info_text(self): return [f"[ {self.data['name']} ]"]
+    def is_active(self): return False
+    def tick(self, world): return False
+    def next_event(self, world): return None
+    def route(self, item_type, ix, iy): return ix, iy, 0.1
+    def accept(self, world, item_type): return False
+    def route_split(self, item_type, count, ix, iy): return [(*self.route(item_type, ix, iy), count)]
+    def accept_many(self, world, item_type, count):
+        n = 0
+        while n < count and self.accept(world, item_type): n += 1
+        return n
+    def _try_output(self, world, output_stack, slot_idx):
+        ox, oy = self.gx, self.gy
+        if self.width == 2:
+             if self.direction == Direction.UP: ox += 0; oy -= 1
+             elif self.direction == Direction.DOWN: ox += 1; oy += 2
+             elif self.direction == Direction.LEFT: ox -= 1; oy += 1
+             elif self.direction == Direction.RIGHT: ox += 2; oy += 0
+        else:
+            dx, dy = self.direction.vector
+            ox += dx; oy += dy
+        
+        if not (world.min_x <= ox < world.max_x and world.min_y <= oy < world.max_y): return True
+        if world.add_item(ItemEntity(output_stack.item_type, ox, oy)):
+            output_stack.count -= 1
+            if output_stack.count <= 0: self.inv.slots[slot_idx] = None
+            return True
+        return not world.stall(self, ox, oy)
+class Crafter(Building):
+    __slots__ = ("inv", "_progress")
+    ticking = True
+    @property
+    def progress(self):
+        if self.timed_at is None: return self._progress
+        return self._progress + self.timed_rate * (self.timed_world.tick_count - self.timed_at)
+    @progress.setter
+    def progress(self, value):
+        if self.timed_at is not None: self.timed_world.wake_building(self)
+        self._progress = value
+class Miner(Building):
+    __slots__ = ("coverage", "mined_resource")
+    ticking = True
+    parks_items = True
+    def __init__(self, b_type, gx, gy, direction=Direction.DOWN):
+        super().__init__(b_type, gx, gy, direction)
+        self.coverage = []
+        self.mined_resource = None
     def get_info_text(self):
-        info = [f"[ {self.data['name']} ]"]
-        if self.type in [BuildingType.MINER, BuildingType.HEAVY_MINER]:
-             info.append(f"작업: {int(self.timer/self.data['rate']*100)}%")
-        elif self.type == BuildingType.SMELTER:
-            status = "대기 중"
-            if self.fuel_left > 0: status = f"작업 중 ({int(self.progress/60*100)}%)" if self.progress>0 else "연소 중"
-            info.append(f"상태: {status}")
-        elif self.type == BuildingType.ASSEMBLER:
-            if self.recipe:
-                r_data = ASSEMBLER_RECIPES[self.recipe]
-                info.append(f"레시피: {r_data['name']}")
-                info.append(f"진행도: {int(self.progress/r_data['time']*100)}%")
-            else: info.append("레시피 미설정")
-        elif self.type == BuildingType.BOX:
-            info.append(f"저장: {sum(1 for s in self.inv.slots if s)} / 27")
-        elif self.type == BuildingType.LAB:
-            info.append(f"자동화 팩: {self.inv.slots[0].count if self.inv.slots[0] else 0}")
-            info.append("연구 진행 중..." if self.active else "대기 중")
-            
-        elif self.type == BuildingType.CLASSIFIER:
-            filter_name = ITEM_DATA[self.filter_item_type]["name"] if self.filter_item_type else "없음"
-            dirs = {-1: "왼쪽", 0: "직진", 1: "오른쪽"}
-            match_dir = dirs.get(self.match_direction_offset, "??")
-            no_match_dir = dirs.get(self.no_match_direction_offset, "??")
-            info.append(f"필터: {filter_name}")
-            info.append(f"일치 시: {match_dir}")
-            info.append(f"불일치 시: {no_match_dir}")
-            
+        info = super().get_info_text()
+        info.append(f"작업: {int(self.timer/self.data['rate']*100)}%")
         return info
-    def tick(self, world):
-        if self.type in [BuildingType.MINER, BuildingType.HEAVY_MINER]: self._tick_miner(world)
-        elif self.type == BuildingType.SMELTER: self._tick_smelter(world)
-        elif self.type == BuildingType.ASSEMBLER: self._tick_assembler(world)
-        elif self.type == BuildingType.LAB: self._tick_lab(world)
-    def _tick_miner(self, world):
+    def update_coverage(self, world):
         radius = self.data.get("radius", 0)
-        found_res = None
+        self.coverage = []
         for dy in range(-radius, radius+1):
             for dx in range(-radius, radius+1):
                 res = world.get_tile_resource(self.gx + dx, self.gy + dy)
-                if res: 
-                    found_res = res
-                    break
-            if found_res: break
-        if found_res:
-            self.timer += 1
-            if self.timer >= self.data["rate"]:
+                if res: self.coverage.append((self.gx + dx, self.gy + dy, res))
+        self.mined_resource = self.coverage[0][2] if self.coverage else None
+    def tick(self, world):
+        found_res = self.mined_resource
+        if not found_res: return False
+        self.timer += 1
+        if self.timer >= self.data["rate"]:
+            dx, dy = self.direction.vector
+            tx, ty = self.gx + dx, self.gy + dy
+            if not (world.min_x <= tx < world.max_x and world.min_y <= ty < world.max_y): self.timer = 0
+            elif world.add_item(ItemEntity(found_res, tx, ty)):
                 self.timer = 0
-                dx, dy = self.direction.to_vector()
-                tx, ty = self.gx + dx, self.gy + dy
-                if not (world.min_x <= tx < world.max_x and world.min_y <= ty < world.max_y): return
-                world.add_item(ItemEntity(found_res, tx, ty))
-    def _tick_smelter(self, world):
+                world.production.produced(self, found_res)
+            elif world.stall(self, tx, ty): return False
+        return True
+class Conveyor(Building):
+    __slots__ = ()
+    def route(self, item_type, ix, iy):
+        dx, dy = self.direction.vector
+        return ix + dx, iy + dy, BUILDING_SPEED[self.type.index]
+class Splitter(Building):
+    __slots__ = ("out_index",)
+    def __init__(self, b_type, gx, gy, direction=Direction.DOWN):
+        super().__init__(b_type, gx, gy, direction)
+        self.out_index = 0
+    def route(self, item_type, ix, iy):
+        dx, dy = DIRECTIONS[(self.direction.index + (1 if self.out_index else -1)) % 4].vector
+        self.out_index = (self.out_index + 1) % 2
+        return ix + dx, iy + dy, BUILDING_SPEED[self.type.index]
+    def route_split(self, item_type, count, ix, iy):
+        first = self.route(item_type, ix, iy)
+        if count == 1: return [(*first, 1)]
+        second = self.route(item_type, ix, iy)
+        if count % 2: self.out_index = (self.out_index + 1) % 2
+        return [(*first, (count + 1) // 2), (*second, count // 2)]
+class Classifier(Building):
+    __slots__ = ("filter_item_type", "match_direction_offset", "no_match_direction_offset")
+    def __init__(self, b_type, gx, gy, direction=Direction.DOWN):
+        super().__init__(b_type, gx, gy, direction)
+        self.filter_item_type = None
+        self.match_direction_offset = 1
+        self.no_match_direction_offset = 0
+    def get_info_text(self):
+        info = super().get_info_text()
+        filter_name = ITEM_DATA[self.filter_item_type]["name"] if self.filter_item_type else "없음"
+        dirs = {-1: "왼쪽", 0: "직진", 1: "오른쪽"}
+        match_dir = dirs.get(self.match_direction_offset, "??")
+        no_match_dir = dirs.get(self.no_match_direction_offset, "??")
+        info.append(f"필터: {filter_name}")
+        info.append(f"일치 시: {match_dir}")
+        info.append(f"불일치 시: {no_match_dir}")
+        return info
+    def route(self, item_type, ix, iy):
+        if not self.filter_item_type: dx, dy = self.direction.vector
+        else:
+            turn_offset = self.match_direction_offset if item_type == self.filter_item_type else self.no_match_direction_offset
+            dx, dy = DIRECTIONS[(self.direction.index + turn_offset) % 4].vector
+        return ix + dx, iy + dy, 0.1
+class Box(Building):
+    __slots__ = ("inv",)
+    def __init__(self, b_type, gx, gy, direction=Direction.DOWN):
+        super().__init__(b_type, gx, gy, direction)
+        self.inv = Inventory(27)
+    def get_info_text(self):
+        info = super().get_info_text()
+        info.append(f"저장: {sum(1 for s in self.inv.slots if s)} / 27")
+        return info
+    def accept(self, world, item_type): return self.inv.add_item(item_type, 1)
+    def accept_many(self, world, item_type, count):
+        n = min(count, self.inv.room_for(item_type))
+        if n: self.inv.add_item(item_type, n)
+        return n
+class SellNode(Building):
+    __slots__ = ()
+    def accept(self, world, item_type):
+        value = ITEM_VALUE[item_type.index]
+        world.money += value
+        world.production.sold(self, item_type, value)
+        return True
+    def accept_many(self, world, item_type, count):
+        value = ITEM_VALUE[item_type.index]
+        world.money += value * count
+        world.production.sold(self, item_type, value, count)
+        return count
+class Smelter(Crafter):
+    __slots__ = ("_fuel_left", "max_fuel_time")
+    def __init__(self, b_type, gx, gy, direction=Direction.DOWN):
+        super().__init__(b_type, gx, gy, direction)
+        self.inv = Inventory(3)
+        self.fuel_left, self.max_fuel_time, self.progress = 0, 1, 0
+    @property
+    def fuel_left(self):
+        if self.timed_at is None: return self._fuel_left
+        return self._fuel_left - (self.timed_world.tick_count - self.timed_at)
+    @fuel_left.setter
+    def fuel_left(self, value):
+        if self.timed_at is not None: self.timed_world.wake_building(self)
+        self._fuel_left = value
+    def get_info_text(self):
+        info = super().get_info_text()
+        status = "대기 중"
+        if self.fuel_left > 0: status = f"작업 중 ({int(self.progress/60*100)}%)" if self.progress>0 else "연소 중"
+        info.append(f"상태: {status}")
+        return info
+    def is_active(self): return self.fuel_left > 0
+    def accept(self, world, item_type): return self.inv.add_item_to_slot(1 if ITEM_FUEL[item_type.index] > 0 else 0, item_type, 1)
+    def accept_many(self, world, item_type, count):
+        slot = 1 if ITEM_FUEL[item_type.index] > 0 else 0
+        n = min(count, self.inv.slot_room(slot, item_type))
+        if n: self.inv.add_item_to_slot(slot, item_type, n)
+        return n
+    def _can_refuel(self):
+        in_s, fuel_s, out_s = self.inv.slots
+        if not (fuel_s and ITEM_FUEL[fuel_s.item_type.index] > 0): return False
+        res = SMELTER_OUTPUT[in_s.item_type.index] if in_s else None
+        if res is None: return False
+        return not out_s or (out_s.item_type == res and out_s.count < out_s.max_stack)
+    def tick(self, world):
         inv = self.inv.slots
         in_s, fuel_s, out_s = inv[0], inv[1], inv[2]
-        if self.fuel_left <= 0 and fuel_s and ITEM_DATA[fuel_s.item_type]["fuel_value"] > 0:
-            if in_s and in_s.item_type in SMELTER_RECIPES:
-                r = SMELTER_RECIPES[in_s.item_type]
-                if not out_s or (out_s.item_type == r["output"] and out_s.count < out_s.max_stack):
-                    self.max_fuel_time = ITEM_DATA[fuel_s.item_type]["fuel_value"]
+        res = SMELTER_OUTPUT[in_s.item_type.index] if in_s else None
+        if self.fuel_left <= 0 and fuel_s and ITEM_FUEL[fuel_s.item_type.index] > 0:
+            if res is not None:
+                if not out_s or (out_s.item_type == res and out_s.count < out_s.max_stack):
+                    self.max_fuel_time = ITEM_FUEL[fuel_s.item_type.index]
                     self.fuel_left = self.max_fuel_time
+                    world.production.consumed(self, fuel_s.item_type)
                     fuel_s.count -= 1
                     if fuel_s.count <= 0: inv[1] = None
         if self.fuel_left > 0:
             self.fuel_left -= 1
-            if in_s and in_s.item_type in SMELTER_RECIPES:
+            if res is not None:
                 self.progress += 1
-                r = SMELTER_RECIPES[in_s.item_type]
-                if self.progress >= r["time"]:
+                if self.progress >= SMELTER_TIME[in_s.item_type.index]:
                     self.progress = 0
-                    res = r["output"]
                     if not out_s: inv[2] = ItemStack(res, 1)
                     else: out_s.count += 1
+                    world.production.produced(self, res)
+                    world.production.consumed(self, in_s.item_type)
                     in_s.count -= 1
                     if in_s.count <= 0: inv[0] = None
             else: self.progress = 0
         else: self.progress = 0
-        if inv[2]: self._try_output(world, inv[2], 2)
-    def _tick_assembler(self, world):
-        if not self.recipe: return
+        if inv[2] and self._try_output(world, inv[2], 2): return True
+        return self.fuel_left > 0 or self._can_refuel()
+    def next_event(self, world):
+        in_s, _, out_s = self.inv.slots
+        if out_s or self._fuel_left <= 0: return None
+        if in_s and SMELTER_OUTPUT[in_s.item_type.index] is not None:
+            return 1, min(SMELTER_TIME[in_s.item_type.index] - self._progress, self._fuel_left + 1)
+        return 0, self._fuel_left + 1
+class Assembler(Crafter):
+    __slots__ = ("_recipe",)
+    def __init__(self, b_type, gx, gy, direction=Direction.DOWN):
+        super().__init__(b_type, gx, gy, direction)
+        self.inv = Inventory(5)
+        self._recipe = None
+        self.progress = 0
+    @property
+    def recipe(self): return self._recipe
+    @recipe.setter
+    def recipe(self, value):
+        self._recipe = value
+        if self.inv.on_change: self.inv.on_change(value)
+    def get_info_text(self):
+        info = super().get_info_text()
+        if self.recipe:
+            r_data = ASSEMBLER_RECIPES[self.recipe]
+            info.append(f"레시피: {r_data['name']}")
+            info.append(f"진행도: {int(self.progress/r_data['time']*100)}%")
+        else: info.append("레시피 미설정")
+        return info
+    def is_active(self): return self.progress > 0
+    def accept(self, world, item_type):
+        if self.recipe and item_type in RECIPE_INPUTS[self.recipe.index]:
+            for i in range(4):
+                if self.inv.add_item_to_slot(i, item_type, 1): return True
+        return False
+    def accept_many(self, world, item_type, count):
+        if not (self.recipe and item_type in RECIPE_INPUTS[self.recipe.index]): return 0
+        n = 0
+        for i in range(4):
+            room = min(count - n, self.inv.slot_room(i, item_type))
+            if room:
+                self.inv.add_item_to_slot(i, item_type, room)
+                n += room
+        return n
+    def tick(self, world):
+        if not self.recipe: return False
         r_data = ASSEMBLER_RECIPES[self.recipe]
         out_s = self.inv.slots[4]
         if out_s and (out_s.item_type != self.recipe or out_s.count >= out_s.max_stack):
             self.progress = 0
-            return
-        if self.inv.has_items(r_data["inputs"]):
+            return False
+        busy = self.inv.has_items(r_data["inputs"])
+        if busy:
             self.progress += 1
             if self.progress >= r_data["time"]:
                 self.progress = 0
                 self.inv.remove_items(r_data["inputs"])
                 if not out_s: self.inv.slots[4] = ItemStack(self.recipe, 1)
                 else: out_s.count += 1
+                for req_type, req_count in r_data["inputs"].items(): world.production.consumed(self, req_type, req_count)
+                world.production.produced(self, self.recipe)
         else: self.progress = 0
-        if self.inv.slots[4]: self._try_output(world, self.inv.slots[4], 4)
-    def _tick_lab(self, world):
+        if self.inv.slots[4] and self._try_output(world, self.inv.slots[4], 4): return True
+        return busy
+    def next_event(self, world):
+        if not self.recipe or self.inv.slots[4]: return None
+        if not self.inv.has_items(ASSEMBLER_RECIPES[self.recipe]["inputs"]): return None
+        return 1, RECIPE_TIME[self.recipe.index] - self._progress
+class Lab(Crafter):
+    __slots__ = ("active",)
+    def __init__(self, b_type, gx, gy, direction=Direction.DOWN):
+        super().__init__(b_type, gx, gy, direction)
+        self.inv = Inventory(1) 
+        self.progress = 0 
+        self.active = False
+    def get_info_text(self):
+        info = super().get_info_text()
+        info.append(f"자동화 팩: {self.inv.slots[0].count if self.inv.slots[0] else 0}")
+        info.append("연구 진행 중..." if self.active else "대기 중")
+        return info
+    def is_active(self): return self.active
+    def accept(self, world, item_type):
+        return item_type == ItemType.SCIENCE_PACK_1 and self.inv.add_item_to_slot(0, item_type, 1)
+    def accept_many(self, world, item_type, count):
+        if item_type != ItemType.SCIENCE_PACK_1: return 0
+        n = min(count, self.inv.slot_room(0, item_type))
+        if n: self.inv.add_item_to_slot(0, item_type, n)
+        return n
+    def tick(self, world):
         self.active = False
-        if world.current_research is None: return 
+        if world.current_research is None: return False
         tech_id = world.current_research
         tech = TECH_DATA[tech_id]
         
         if world.research_progress >= tech["cost"]:
             world.complete_research()
-            return
+            return True
         pack_slot = self.inv.slots[0]
         if pack_slot and pack_slot.item_type == ItemType.SCIENCE_PACK_1:
             self.active = True
@@ -278,73 +778,128 @@ class Building:
                 self.progress = 0
                 pack_slot.count -= 1
                 if pack_slot.count <= 0: self.inv.slots[0] = None
+                world.production.consumed(self, ItemType.SCIENCE_PACK_1)
                 world.research_progress += 1
-    def _try_output(self, world, output_stack, slot_idx):
-        ox, oy = self.gx, self.gy
-        if self.width == 2:
-             if self.direction == Direction.UP: ox += 0; oy -= 1
-             elif self.direction == Direction.DOWN: ox += 1; oy += 2
-             elif self.direction == Direction.LEFT: ox -= 1; oy += 1
-             elif self.direction == Direction.RIGHT: ox += 2; oy += 0
-        else:
-            dx, dy = self.direction.to_vector()
-            ox += dx; oy += dy
-        
-        if not (world.min_x <= ox < world.max_x and world.min_y <= oy < world.max_y): return
-        if world.add_item(ItemEntity(output_stack.item_type, ox, oy)):
-            output_stack.count -= 1
-            if output_stack.count <= 0: self.inv.slots[slot_idx] = None
+                if world.research_progress >= tech["cost"]: world.wake_labs()
+            return True
+        return False
+    def next_event(self, world):
+        pack_slot = self.inv.slots[0]
+        if not (pack_slot and pack_slot.item_type == ItemType.SCIENCE_PACK_1) or world.current_research is None: return None
+        if world.research_progress >= TECH_DATA[world.current_research]["cost"]: return None
+        return 1, 60 - self._progress
+BUILDING_CLASSES = {
+    BuildingType.CONVEYOR: Conveyor, BuildingType.FAST_CONVEYOR: Conveyor,
+    BuildingType.MINER: Miner, BuildingType.HEAVY_MINER: Miner,
+    BuildingType.SMELTER: Smelter, BuildingType.BOX: Box, BuildingType.SELL_NODE: SellNode,
+    BuildingType.SPLITTER: Splitter, BuildingType.ASSEMBLER: Assembler, BuildingType.LAB: Lab,
+    BuildingType.CLASSIFIER: Classifier,
+}
 class World:
-    def __init__(self):
-        self.max_width, self.max_height = GRID_WIDTH, GRID_HEIGHT
+    def __init__(self, item_store=None, transport=None, crafting_timers=False, generate=True,
+                 width=GRID_WIDTH, height=GRID_HEIGHT, generator=None, seed=None, tile_capacity=None):
+        self.max_width, self.max_height = width, height
+        if seed is not None and generator is None:
+            from mapgen import ChunkGenerator
+            generator = ChunkGenerator(seed)
         
         start_size = 9
         self.min_x = (self.max_width - start_size) // 2 
         self.min_y = (self.max_height - start_size) // 2
         self.max_x = self.min_x + start_size             
         self.max_y = self.min_y + start_size             
-        self.tiles = [[None for _ in range(self.max_width)] for _ in range(self.max_height)]
+        self.tiles = TileGrid(self.max_width, self.max_height, generator=generator)
+        self.tiles.on_generate = self._chunk_generated
+        self.resource_index = ResourceIndex()
         self.buildings = {}
-        self.items = []
+        self.chunk_buildings = {}
+        self.registry = {}
+        self.awake = {}
+        self.awake_dirty = False
+        self.next_seq = 0
+        self.tick_count = 0
+        self.ticking_seq = None
+        self.late_wakes = []
+        self.crafting_timers = crafting_timers
+        self.timers = []
+        self.profiler = None
+        self.production = ProductionStats(self)
+        self.dirty_chunks = set()
+        self.terrain_version = 0
+        self.building_version = 0
+        self.tile_capacity = tile_capacity
+        self.stacking = transport == "stacks"
+        if self.stacking and tile_capacity is not None: raise ValueError("stacked transport and tile_capacity cannot be combined")
+        if item_store == "array":
+            if tile_capacity is not None: raise ValueError("tile_capacity needs the object item store")
+            if self.stacking: raise ValueError("stacked transport needs the object item store")
+            from itemstore import ArrayItemStore
+            self.items = ArrayItemStore()
+        else: self.items = ItemIndex(tile_capacity, self.stacking)
+        if transport == "lanes":
+            from belts import BeltNetwork
+            self.belts = BeltNetwork()
+        else: self.belts = None
         self.money = 500
-        self.player_inv = Inventory(36)
+        self.player_inv = Inventory(36, PLAYER_SLOT_ORDER)
         self.player_inv.add_item(ItemType.MINER, 1)
         self.player_inv.add_item(ItemType.CONVEYOR, 10)
         self.missions = {}
         self.available_missions = [MissionType.START_UP]
         self.mission_alert = False
+        self.player_inv.on_change = self._player_inv_changed
+        self._track_missions()
         self.unlocked_techs = set()
         self.current_research = None 
         self.research_progress = 0   
         self.purchased_upgrades = set() 
         self.passive_income_per_sec = 0 
-        self.generate_map()
+        if generate: self.generate_map()
     def generate_map(self):
         start_box = (self.min_x, self.min_y, self.max_x, self.max_y)
-        self._spawn_exact_patch(ItemType.IRON_ORE, *start_box)
-        self._spawn_exact_patch(ItemType.IRON_ORE, *start_box)
-        self._spawn_exact_patch(ItemType.IRON_ORE, *start_box)
-        self._spawn_exact_patch(ItemType.COPPER_ORE, *start_box)
-        self._spawn_exact_patch(ItemType.COPPER_ORE, *start_box)
-        self._spawn_exact_patch(ItemType.COPPER_ORE, *start_box)
-        self._spawn_exact_patch(ItemType.COAL_ORE, *start_box)
-        self._spawn_exact_patch(ItemType.WOOD, *start_box)
-        self._spawn_exact_patch(ItemType.WOOD, *start_box)
-        self._spawn_exact_patch(ItemType.WOOD, *start_box)
+        if self.tiles.generator:
+            self._ensure_starter(*start_box)
+            return
+        spots = self._free_spots(*start_box)
+        self._spawn_exact_patch(ItemType.IRON_ORE, spots)
+        self._spawn_exact_patch(ItemType.IRON_ORE, spots)
+        self._spawn_exact_patch(ItemType.IRON_ORE, spots)
+        self._spawn_exact_patch(ItemType.COPPER_ORE, spots)
+        self._spawn_exact_patch(ItemType.COPPER_ORE, spots)
+        self._spawn_exact_patch(ItemType.COPPER_ORE, spots)
+        self._spawn_exact_patch(ItemType.COAL_ORE, spots)
+        self._spawn_exact_patch(ItemType.WOOD, spots)
+        self._spawn_exact_patch(ItemType.WOOD, spots)
+        self._spawn_exact_patch(ItemType.WOOD, spots)
         for _ in range(6): self._spawn_cluster(ItemType.IRON_ORE, 0.7, exclude_box=start_box)
         for _ in range(4): self._spawn_cluster(ItemType.COPPER_ORE, 0.6, exclude_box=start_box)
         for _ in range(5): self._spawn_cluster(ItemType.COAL_ORE, 0.65, exclude_box=start_box)
         for _ in range(8): self._spawn_cluster(ItemType.WOOD, 0.8, exclude_box=start_box)
-    def _spawn_exact_patch(self, item_type, min_x, min_y, max_x, max_y):
+        self.resource_index.rebuild(self.tiles)
+    def _chunk_generated(self, cx, cy, data):
+        self.resource_index.add_chunk(cx, cy, data, self.tiles.chunk_size)
+        self.dirty_chunks.add((cx, cy))
+        self.terrain_version += 1
+    def _ensure_starter(self, min_x, min_y, max_x, max_y):
+        rng = random.Random(self.tiles.generator.seed)
+        found = self.count_resources(min_x, min_y, max_x, max_y)
+        for res in STARTER_RESOURCES:
+            if found.get(res): continue
+            spots = self._free_spots(min_x, min_y, max_x, max_y)
+            if spots: self.set_tile_resource(*rng.choice(spots), res)
+    def _free_spots(self, min_x, min_y, max_x, max_y):
         available_spots = []
         for y in range(min_y, max_y):
             for x in range(min_x, max_x):
                 if 0 <= x < self.max_width and 0 <= y < self.max_height:
-                    if self.tiles[y][x] is None:
+                    if self.tiles.get(x, y) is None:
                         available_spots.append((x, y))
+        return available_spots
+    def _spawn_exact_patch(self, item_type, available_spots):
         if not available_spots: return False
         x, y = random.choice(available_spots)
-        self.tiles[y][x] = item_type
+        available_spots.remove((x, y))
+        self.tiles.set(x, y, item_type)
         return True
     def _spawn_cluster(self, item_type, chance, min_x=0, min_y=0, max_x=None, max_y=None, exclude_box=None):
         if max_x is None: max_x = self.max_width
@@ -360,11 +915,30 @@ class World:
                         ex_min_x, ex_min_y, ex_max_x, ex_max_y = exclude_box
                         if (ex_min_x <= x < ex_max_x and ex_min_y <= y < ex_max_y): continue     
                     if 0 <= x < self.max_width and 0 <= y < self.max_height:
-                        if self.tiles[y][x] is None and random.random() > (1.0 - chance): 
-                                self.tiles[y][x] = item_type
+                        if self.tiles.get(x, y) is None and random.random() > (1.0 - chance): 
+                                self.tiles.set(x, y, item_type)
     def get_tile_resource(self, x, y):
-        if 0 <= x < self.max_width and 0 <= y < self.max_height: return self.tiles[y][x]
+        if 0 <= x < self.max_width and 0 <= y < self.max_height: return self.tiles.get(x, y)
         return None
+    def set_tile_resource(self, x, y, res):
+        old = self.get_tile_resource(x, y)
+        if old == res or not (0 <= x < self.max_width and 0 <= y < self.max_height): return
+        if old: self.resource_index.remove(x, y, old)
+        if res: self.resource_index.add(x, y, res)
+        self.tiles.set(x, y, res)
+        self.mark_dirty(x, y)
+        self.terrain_version += 1
+        for dy in range(-MAX_MINER_RADIUS, MAX_MINER_RADIUS + 1):
+            for dx in range(-MAX_MINER_RADIUS, MAX_MINER_RADIUS + 1):
+                b = self.buildings.get((x + dx, y + dy))
+                if isinstance(b, Miner):
+                    b.update_coverage(self)
+                    self.wake_building(b)
+    def count_resources(self, x0=None, y0=None, x1=None, y1=None):
+        if x0 is None: return dict(self.resource_index.totals)
+        self.tiles.load_rect(x0, y0, x1, y1)
+        return self.resource_index.count_in(self.tiles, x0, y0, x1, y1)
+    def territory_resources(self): return self.count_resources(self.min_x, self.min_y, self.max_x, self.max_y)
     def can_place_building(self, gx, gy, width, height):
         for y in range(gy, gy + height):
             for x in range(gx, gx + width):
@@ -375,6 +949,19 @@ class World:
         for y in range(building.gy, building.gy + building.height):
             for x in range(building.gx, building.gx + building.width):
                 self.buildings[(x, y)] = building
+                self.items.wake_tile(x, y)
+        if isinstance(building, Miner): building.update_coverage(self)
+        self.mark_dirty(building.gx, building.gy)
+        self.chunk_buildings.setdefault(self.chunk_key(building.gx, building.gy), {})[building] = None
+        building.seq = self.next_seq
+        self.next_seq += 1
+        self.registry[building] = None
+        self.building_version += 1
+        if hasattr(building, "inv"): building.inv.on_change = lambda item_type: self._inv_changed(building)
+        self.wake_building(building)
+        if self.belts is not None and building.type in BELT_TYPES:
+            self.belts.add_tile(self, building.gx, building.gy)
+            if self.tile_capacity is not None: self.items.wake_stalled((building.gx, building.gy))
     def remove_building(self, gx, gy):
         b = self.buildings.get((gx, gy))
         if b:
@@ -382,6 +969,16 @@ class World:
             for y in range(b.gy, b.gy + b.height):
                 for x in range(b.gx, b.gx + b.width):
                      if (x,y) in self.buildings: del self.buildings[(x,y)]
+            self.mark_dirty(b.gx, b.gy)
+            key = self.chunk_key(b.gx, b.gy)
+            self.chunk_buildings[key].pop(b, None)
+            if not self.chunk_buildings[key]: del self.chunk_buildings[key]
+            self.registry.pop(b, None)
+            self.building_version += 1
+            self.awake.pop(b, None)
+            if hasattr(b, 'inv'): b.inv.on_change = None
+            self.items.wake_parked(b)
+            if self.belts is not None and b.type in BELT_TYPES: self.belts.remove_tile(self, b.gx, b.gy)
             self.player_inv.add_item(BUILDING_TO_ITEM[b.type], 1)
             if hasattr(b, 'inv'):
                 for stack in b.inv.slots:
@@ -389,15 +986,66 @@ class World:
             return True
         return False
     def get_building_at(self, x, y): return self.buildings.get((x, y))
+    def buildings_in_rect(self, x0, y0, x1, y1):
+        cx0, cy0 = self.chunk_key(x0 - 1, y0 - 1)
+        cx1, cy1 = self.chunk_key(x1 - 1, y1 - 1)
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                for b in self.chunk_buildings.get((cx, cy), ()):
+                    if b.gx < x1 and b.gy < y1 and b.gx + b.width > x0 and b.gy + b.height > y0: yield b
+    def chunk_key(self, x, y): return x // CHUNK_SIZE, y // CHUNK_SIZE
+    def mark_dirty(self, x, y): self.dirty_chunks.add(self.chunk_key(x, y))
+    def wake_building(self, b):
+        if b.ticking and b not in self.awake and b in self.registry:
+            if b.timed_at is not None: self._untime(b)
+            self.awake[b] = None
+            self.awake_dirty = True
+            if self.ticking_seq is not None and b.seq > self.ticking_seq: self.late_wakes.append(b)
+    def _inv_changed(self, b):
+        self.wake_building(b)
+        self.items.wake_parked(b)
+    def wake_labs(self):
+        for b in self.registry:
+            if b.type == BuildingType.LAB: self.wake_building(b)
+    def _time(self, b, rate, ticks):
+        b.timed_at, b.timed_rate, b.timed_world = self.tick_count, rate, self
+        b.timed_token += 1
+        heapq.heappush(self.timers, (self.tick_count + ticks, b.seq, b.timed_token, b))
+    def _untime(self, b, through=None):
+        if through is None:
+            through = self.tick_count - 1 if self.ticking_seq is not None and b.seq > self.ticking_seq else self.tick_count
+        elapsed = through - b.timed_at
+        b._progress += b.timed_rate * elapsed
+        if b.type == BuildingType.SMELTER: b._fuel_left -= elapsed
+        b.timed_at = None
+        b.timed_token += 1
     
     def add_item(self, item_entity):
+        if self.belts is not None and (item_entity.x, item_entity.y) in self.belts.tile_map:
+            return self.belts.insert(item_entity.type, item_entity.x, item_entity.y)
+        if self.stacking and self.items.merge(item_entity.x, item_entity.y, item_entity.type, item_entity.count): return True
         if len(self.items) >= MAX_ITEMS: return False
-        self.items.append(item_entity)
+        if self.tile_capacity is not None and not self.items.has_room(item_entity.x, item_entity.y): return False
+        self.items.add(item_entity)
+        return True
+    def stall(self, b, x, y):
+        if self.tile_capacity is None or self.items.has_room(x, y): return False
+        if self.belts is not None and (x, y) in self.belts.tile_map: return False
+        self.items.stalled.setdefault((x, y), {})[b] = None
         return True
+    def pickup_items(self, px, py, radius=PICKUP_RADIUS):
+        picked = 0
+        for item in list(self.items.near(px, py, radius)):
+            if self.player_inv.room_for(item.type) >= item.count and self.player_inv.add_item(item.type, item.count):
+                self.items.remove(item)
+                picked += item.count
+        return picked
     def start_research(self, tech_id):
         if tech_id not in self.unlocked_techs and tech_id != self.current_research:
             self.current_research = tech_id
             self.research_progress = 0
+            for b in self.registry:
+                if b.type == BuildingType.LAB: self.wake_building(b)
     def complete_research(self):
         if self.current_research:
             self.unlocked_techs.add(self.current_research)
@@ -422,89 +1070,215 @@ class World:
             return True
         return False
     def tick(self):
+        prof = self.profiler
+        if prof is None:
+            self.update_mission_status()
+            self._tick_buildings()
+            self._tick_items()
+            return
+        prof.begin()
         self.update_mission_status()
+        prof.phase("missions")
+        self._tick_buildings()
+        prof.phase("buildings")
+        self._tick_items()
+        prof.phase("items")
+        prof.end(self)
+    def enable_profiling(self, window=PROFILE_WINDOW):
+        from profiler import Profiler
+        self.profiler = Profiler(window)
+        self.items.trail = []
+        if self.belts is not None: self.belts.trail = []
+        return self.profiler
+    def _tick_buildings(self):
         if self.passive_income_per_sec > 0:
             self.money += self.passive_income_per_sec / LOGIC_TICK_RATE
-        for b in set(self.buildings.values()): b.tick(self)
-        items_to_remove = []
+        self.tick_count += 1
+        timers = self.timers
+        while timers and timers[0][0] <= self.tick_count:
+            _, _, token, b = heapq.heappop(timers)
+            if b.timed_token != token or b.timed_at is None or b not in self.registry: continue
+            self._untime(b, self.tick_count - 1)
+            self.wake_building(b)
+        if self.tile_capacity is not None and self.items.restarted:
+            for b in self.items.restarted: self.wake_building(b)
+            self.items.restarted.clear()
+        if self.awake_dirty:
+            self.awake = dict.fromkeys(sorted(self.awake, key=lambda b: b.seq))
+            self.awake_dirty = False
+        queue = list(self.awake)
+        prof = self.profiler
+        i = 0
+        while i < len(queue):
+            b = queue[i]
+            i += 1
+            self.ticking_seq = b.seq
+            busy = b.tick(self) if prof is None else prof.building(b, self)
+            if not busy: self.awake.pop(b, None)
+            elif self.crafting_timers:
+                event = b.next_event(self)
+                if event and event[1] > 1:
+                    self.awake.pop(b, None)
+                    self._time(b, *event)
+            if self.late_wakes:
+                queue[i:] = sorted(set(queue[i:] + self.late_wakes), key=lambda b: b.seq)
+                self.late_wakes.clear()
+        self.ticking_seq = None
+    def _tick_items(self):
+        self.items.advance(self)
+        if self.belts is not None: self.belts.tick(self)
+    def route_item(self, item_type, ix, iy):
+        b = self.get_building_at(ix, iy)
+        if not b: return b, ix, iy, 0.1, False
+        if self.belts is not None and b.type in BELT_TYPES:
+            return b, ix, iy, 0.1, self.belts.insert(item_type, ix, iy)
+        target_x, target_y, speed_mult = b.route(item_type, ix, iy)
+        if not (self.min_x <= target_x < self.max_x and self.min_y <= target_y < self.max_y):
+             target_x, target_y = ix, iy
+        return b, target_x, target_y, speed_mult, b.accept(self, item_type)
+    def route_stack(self, item_type, count, ix, iy):
+        b = self.get_building_at(ix, iy)
+        if not b: return b, [(ix, iy, 0.1, count)], 0
+        taken = b.accept_many(self, item_type, count)
+        if taken == count: return b, [], taken
+        routes = [(tx, ty, speed, n) if self.min_x <= tx < self.max_x and self.min_y <= ty < self.max_y else (ix, iy, speed, n)
+                  for tx, ty, speed, n in b.route_split(item_type, count - taken, ix, iy)]
+        if len(routes) == 2 and routes[0][:2] == routes[1][:2]: routes = [(*routes[0][:3], count - taken)]
+        return b, routes, taken
+    def advance(self, seconds):
+        start_money = self.money
+        ticks = int(round(seconds * LOGIC_TICK_RATE))
+        window = FAST_FORWARD_WINDOW
+        while ticks > 0:
+            if ticks < 2 * window:
+                for _ in range(ticks): self.tick()
+                break
+            before = self._snapshot()
+            self.production.log = []
+            for _ in range(window): self.tick()
+            ticks -= window
+            after = self._snapshot()
+            k = self._steady_windows(before, after, ticks // window)
+            if k > 0:
+                self._apply_windows(before, after, k)
+                ticks -= k * window
+            self.production.log = None
+        return self.money - start_money
+    def _snapshot(self):
+        def slots(inv): return [(s.item_type, s.count) if s else None for s in inv.slots]
+        return {
+            "money": self.money,
+            "tick": self.tick_count,
+            "research": (self.current_research, self.research_progress, frozenset(self.unlocked_techs)),
+            "missions": (dict(self.missions), tuple(self.available_missions)),
+            "player": slots(self.player_inv),
+            "buildings": {b: slots(b.inv) for b in self.registry if hasattr(b, "inv")},
+            "phase": {b: (b.timer, getattr(b, "progress", None), getattr(b, "fuel_left", None), getattr(b, "out_index", None))
+                      for b in self.registry},
+            "ground": self._ground_counts(),
+        }
+    def _ground_counts(self):
+        counts = {}
         for item in self.items:
-            if item.progress > 0: continue
-            ix, iy = int(item.x), int(item.y)
-            b = self.get_building_at(ix, iy)
-            
-            speed_mult = 0.1
-            
-            if b:
-                if b.type in [BuildingType.CONVEYOR, BuildingType.FAST_CONVEYOR]:
-                    speed_mult = b.data.get("speed", 0.1)
-                    dx, dy = b.direction.to_vector()
-                    target_x, target_y = ix + dx, iy + dy
-                
-                elif b.type == BuildingType.SPLITTER:
-                    speed_mult = b.data.get("speed", 0.1)
-                    dirs = [Direction((b.direction.value - 1) % 4), Direction((b.direction.value + 1) % 4)]
-                    dx, dy = dirs[b.out_index].to_vector()
-                    target_x, target_y = ix + dx, iy + dy
-                    b.out_index = (b.out_index + 1) % 2
-                
-                elif b.type == BuildingType.CLASSIFIER:
-                    speed_mult = 0.1
-                    
-                    if not b.filter_item_type:
-                        dx, dy = b.direction.to_vector()
-                        target_x, target_y = ix + dx, iy + dy
-                    else:
-                        is_match = (item.type == b.filter_item_type)
-                        
-                        if is_match:
-                            turn_offset = b.match_direction_offset
-                        else:
-                            turn_offset = b.no_match_direction_offset
-                            
-                        target_dir = Direction((b.direction.value + turn_offset) % 4)
-                        dx, dy = target_dir.to_vector()
-                        target_x, target_y = ix + dx, iy + dy
-                
-                else:
-                    target_x, target_y = ix, iy
-                if not (self.min_x <= target_x < self.max_x and self.min_y <= target_y < self.max_y):
-                     item.target_x, item.target_y = ix, iy
-                else:
-                    item.target_x, item.target_y = target_x, target_y
-                if b.type == BuildingType.SELL_NODE:
-                    self.money += ITEM_DATA[item.type].get("value", 0)
-                    items_to_remove.append(item)
-                elif b.type == BuildingType.BOX:
-                     if b.inv.add_item(item.type, 1): items_to_remove.append(item)
-                elif b.type == BuildingType.SMELTER:
-                    is_fuel = ITEM_DATA[item.type].get("fuel_value", 0) > 0
-                    target = 1 if is_fuel else 0
-                    if b.inv.add_item_to_slot(target, item.type, 1): items_to_remove.append(item)
-                elif b.type == BuildingType.ASSEMBLER:
-                    if b.recipe and item.type in ASSEMBLER_RECIPES[b.recipe]["inputs"]:
-                         for i in range(4):
-                             if b.inv.add_item_to_slot(i, item.type, 1):
-                                 items_to_remove.append(item)
-                                 break
-                elif b.type == BuildingType.LAB:
-                    if item.type == ItemType.SCIENCE_PACK_1:
-                         if b.inv.add_item_to_slot(0, item.type, 1):
-                            items_to_remove.append(item)
-            item.update(speed_mult)
-        for item in items_to_remove:
-            if item in self.items: self.items.remove(item)
-        for item in self.items: item.update(0.1)
-    def update_mission_status(self):
-        alert = False
-        for mission_id in self.available_missions:
-            if self.missions.get(mission_id) in ["completed", "ready"]:
-                if self.missions.get(mission_id) == "ready": alert = True 
+            key = (item.x, item.y, item.type)
+            counts[key] = counts.get(key, 0) + item.count
+        if self.belts is not None:
+            for seg in self.belts.segments:
+                for item_type in seg.items:
+                    key = (seg.tiles[0], item_type)
+                    counts[key] = counts.get(key, 0) + 1
+        return counts
+    def _steady_windows(self, before, after, limit):
+        if before["missions"] != after["missions"] or before["player"] != after["player"]: return 0
+        if before["phase"] != after["phase"] or before["ground"] != after["ground"]: return 0
+        research, rp0, techs = before["research"]
+        if (research, techs) != (after["research"][0], after["research"][2]): return 0
+        k = limit
+        if research:
+            d = after["research"][1] - rp0
+            if d > 0: k = min(k, (TECH_DATA[research]["cost"] - after["research"][1] - 1) // d)
+        for b, old in before["buildings"].items():
+            new = after["buildings"].get(b)
+            if new is None: return 0
+            if b.type == BuildingType.BOX:
+                totals = {}
+                for s in old:
+                    if s: totals[s[0]] = totals.get(s[0], 0) - s[1]
+                for s in new:
+                    if s: totals[s[0]] = totals.get(s[0], 0) + s[1]
+                gain = sum(d for d in totals.values() if d > 0)
+                for item_type, d in totals.items():
+                    if d < 0: k = min(k, b.inv.count_items(item_type) // -d)
+                if gain:
+                    free = sum(ITEM_STACK_SIZE - s[1] if s else ITEM_STACK_SIZE for s in new if s is None or totals.get(s[0], 0) > 0)
+                    k = min(k, (free - ITEM_STACK_SIZE * len(totals)) // gain)
                 continue
-            reqs = MISSION_DATA[mission_id]["requirements"]
-            if self.player_inv.has_items(reqs):
-                self.missions[mission_id] = "ready"
-                alert = True
-        self.mission_alert = alert
+            for s0, s1 in zip(old, new):
+                if s0 is None and s1 is None: continue
+                if s0 is None or s1 is None or s0[0] != s1[0]: return 0
+                d = s1[1] - s0[1]
+                if d < 0: k = min(k, (s1[1] - 1) // -d)
+                elif d > 0: k = min(k, (ITEM_STACK_SIZE - s1[1]) // d)
+            if k <= 0: return 0
+        return max(k, 0)
+    def _apply_windows(self, before, after, k):
+        window = after["tick"] - before["tick"]
+        shift = window * k
+        self.tick_count += shift
+        self.timers = [(at + shift, seq, token, b) for at, seq, token, b in self.timers]
+        for b in self.registry:
+            if b.timed_at is not None: b.timed_at += shift
+        self.money += (after["money"] - before["money"]) * k
+        self.production.extend(before["tick"] + 1, window, k)
+        if self.current_research:
+            self.research_progress += (after["research"][1] - before["research"][1]) * k
+        for b, old in before["buildings"].items():
+            new = after["buildings"][b]
+            if b.type == BuildingType.BOX:
+                totals = {}
+                for s in old:
+                    if s: totals[s[0]] = totals.get(s[0], 0) - s[1]
+                for s in new:
+                    if s: totals[s[0]] = totals.get(s[0], 0) + s[1]
+                for item_type, d in totals.items():
+                    if d < 0: b.inv.remove_item(item_type, -d * k)
+                    n = d * k
+                    while n > 0:
+                        b.inv.add_item(item_type, min(n, ITEM_STACK_SIZE))
+                        n -= ITEM_STACK_SIZE
+                continue
+            for i, (s0, s1) in enumerate(zip(old, new)):
+                if s0 and s1 and s1[1] != s0[1]: b.inv.slots[i].count += (s1[1] - s0[1]) * k
+            self.wake_building(b)
+    def _track_missions(self):
+        self.mission_index = {}
+        self.ready_missions = set()
+        self.dirty_missions = set()
+        for mission_id in self.available_missions: self._watch_mission(mission_id)
+    def _watch_mission(self, mission_id):
+        status = self.missions.get(mission_id)
+        if status == "ready": self.ready_missions.add(mission_id)
+        if status in ["completed", "ready"]: return
+        for item_type in MISSION_DATA[mission_id]["requirements"]:
+            self.mission_index.setdefault(item_type, set()).add(mission_id)
+        self.dirty_missions.add(mission_id)
+    def _unwatch_mission(self, mission_id):
+        for item_type in MISSION_DATA[mission_id]["requirements"]:
+            self.mission_index[item_type].discard(mission_id)
+        self.dirty_missions.discard(mission_id)
+    def _player_inv_changed(self, item_type):
+        watchers = self.mission_index.get(item_type)
+        if watchers: self.dirty_missions.update(watchers)
+    def update_mission_status(self):
+        if self.dirty_missions:
+            for mission_id in list(self.dirty_missions):
+                reqs = MISSION_DATA[mission_id]["requirements"]
+                if self.player_inv.has_items(reqs):
+                    self.missions[mission_id] = "ready"
+                    self.ready_missions.add(mission_id)
+                    self._unwatch_mission(mission_id)
+            self.dirty_missions.clear()
+        self.mission_alert = bool(self.ready_missions)
     def complete_mission(self, mission_id):
         if self.missions.get(mission_id) != "ready": return False
         data = MISSION_DATA[mission_id]
@@ -518,13 +1292,16 @@ class World:
             self.min_y = max(0, self.min_y - expand_by // 2)
             self.max_x = min(self.max_width, self.max_x + (expand_by - expand_by // 2))
             self.max_y = min(self.max_height, self.max_y + (expand_by - expand_by // 2))
+            self.terrain_version += 1
         self.missions[mission_id] = "completed"
+        self.ready_missions.discard(mission_id)
         if mission_id in self.available_missions: self.available_missions.remove(mission_id)
         if "unlocks" in data:
             for next_mission_id in data["unlocks"]:
                 if next_mission_id not in self.missions:
                     self.available_missions.append(next_mission_id)
                     self.missions[next_mission_id] = "pending"
+                    self._watch_mission(next_mission_id)
         
         self.update_mission_status()
         return True
\ No newline at end of file
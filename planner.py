@@ -0,0 +1,73 @@
+import math
+import sys
+from config import *
+from gamedata import *
+from belts import ITEM_GAP
+MINER_TYPES = (BuildingType.MINER, BuildingType.HEAVY_MINER)
+BELT_TYPES = (BuildingType.CONVEYOR, BuildingType.FAST_CONVEYOR)
+RAW_RESOURCES = tuple(t for t, d in ITEM_DATA.items() if "tile_image" in d)
+EPS = 1e-9
+def machines(n): return math.ceil(n - EPS)
+class Planner:
+    def __init__(self, smelter_recipes=SMELTER_RECIPES, assembler_recipes=ASSEMBLER_RECIPES, building_data=BUILDING_DATA):
+        self.recipes = {}
+        for ore, r in smelter_recipes.items(): self.recipes[r["output"]] = (BuildingType.SMELTER, r["time"], {ore: 1})
+        for out, r in assembler_recipes.items(): self.recipes[out] = (BuildingType.ASSEMBLER, r["time"], dict(r["inputs"]))
+        self.miner_rates = {t: LOGIC_TICK_RATE / building_data[t]["rate"] for t in MINER_TYPES}
+        self.belt_rates = {t: building_data[t]["speed"] * LOGIC_TICK_RATE / ITEM_GAP for t in BELT_TYPES}
+        self.units = {}
+        self.cache = {}
+    def unit_flows(self, item_type, visiting=()):
+        if item_type in self.units: return self.units[item_type]
+        if item_type in visiting: raise ValueError(f"순환 레시피: {item_type.name}")
+        flows = {item_type: 1.0}
+        if item_type in self.recipes:
+            for in_type, n in self.recipes[item_type][2].items():
+                for t, rate in self.unit_flows(in_type, visiting + (item_type,)).items(): flows[t] = flows.get(t, 0) + n * rate
+        self.units[item_type] = flows
+        return flows
+    def plan(self, target, rate, miner=BuildingType.MINER, belt=BuildingType.CONVEYOR, fuel=ItemType.COAL_ORE):
+        key = (target, rate, miner, belt, fuel)
+        if key in self.cache: return self.cache[key]
+        flows = {t: r * rate for t, r in self.unit_flows(target).items()}
+        steps, raw, fuel_rate = {}, {}, 0.0
+        for item_type, r in flows.items():
+            if item_type not in self.recipes:
+                raw[item_type] = raw.get(item_type, 0) + r
+                continue
+            b_type, time, _ = self.recipes[item_type]
+            steps[item_type] = (b_type, r * time / LOGIC_TICK_RATE)
+            if b_type == BuildingType.SMELTER: fuel_rate += r * time / ITEM_DATA[fuel]["fuel_value"]
+        if fuel_rate: raw[fuel] = raw.get(fuel, 0) + fuel_rate
+        buildings = {}
+        for b_type, n in steps.values(): buildings[b_type] = buildings.get(b_type, 0) + machines(n)
+        miners = {t: r / self.miner_rates[miner] for t, r in raw.items() if t in RAW_RESOURCES}
+        if miners: buildings[miner] = sum(machines(n) for n in miners.values())
+        belt_rate = self.belt_rates[belt]
+        result = {
+            "target": target, "rate": rate,
+            "steps": steps, "miners": miners, "buildings": buildings,
+            "flows": flows, "raw": raw, "fuel": fuel_rate,
+            "belt_rate": belt_rate, "belts": {t: machines(r / belt_rate) for t, r in {**flows, **raw}.items()},
+        }
+        self.cache[key] = result
+        return result
+_planner = None
+def get_planner():
+    global _planner
+    if _planner is None: _planner = Planner()
+    return _planner
+def plan(target, rate, **kwargs): return get_planner().plan(target, rate, **kwargs)
+def print_plan(p):
+    name = lambda t: ITEM_DATA[t]["name"]
+    print(f"{name(p['target'])} {p['rate']:g}/s")
+    for item_type, (b_type, n) in p["steps"].items():
+        print(f"  {name(item_type)}: {BUILDING_DATA[b_type]['name']} {n:.2f} -> {machines(n)}대, {p['flows'][item_type]:.2f}/s, 벨트 {p['belts'][item_type]}줄")
+    for item_type, n in p["miners"].items():
+        print(f"  {name(item_type)}: 채굴 {p['raw'][item_type]:.2f}/s, 채굴기 {n:.2f} -> {machines(n)}대, 벨트 {p['belts'][item_type]}줄")
+    print("  합계: " + ", ".join(f"{BUILDING_DATA[b]['name']} {n}" for b, n in p["buildings"].items()))
+if __name__ == "__main__":
+    if len(sys.argv) < 3: sys.exit("usage: planner.py ITEM_TYPE RATE [MINER_TYPE] [BELT_TYPE]")
+    print_plan(plan(ItemType[sys.argv[1]], float(sys.argv[2]),
+                    miner=BuildingType[sys.argv[3]] if len(sys.argv) > 3 else BuildingType.MINER,
+                    belt=BuildingType[sys.argv[4]] if len(sys.argv) > 4 else BuildingType.CONVEYOR))
\ No newline at end of file
@@ -0,0 +1,108 @@
+from config import *
+from gamedata import *
+EVENTS = ("produced", "consumed", "sold", "earned")
+class Ring:
+    def __init__(self, size, span):
+        self.size, self.span = size, span
+        self.ids = [None] * size
+        self.slots = [None] * size
+    def bucket(self, tick):
+        idx = tick // self.span
+        i = idx % self.size
+        if self.ids[i] != idx:
+            self.ids[i] = idx
+            self.slots[i] = {}
+        return self.slots[i]
+    def total(self, tick, count):
+        idx = tick // self.span
+        out = {}
+        for k in range(idx - min(count, self.size) + 1, idx + 1):
+            i = k % self.size
+            if self.ids[i] != k: continue
+            for key, n in self.slots[i].items(): out[key] = out.get(key, 0) + n
+        return out
+    def add(self, tick, counts):
+        bucket = self.bucket(tick)
+        for key, n in counts.items(): bucket[key] = bucket.get(key, 0) + n
+    def repeat(self, entries, start, window, k):
+        first = max(1, k - self.size * self.span // window - 1)
+        if self.span < window:
+            for j in range(first, k + 1):
+                for tick, key, n in entries: self.add(tick + j * window, {key: n})
+            return
+        total = {}
+        for _, key, n in entries: total[key] = total.get(key, 0) + n
+        cuts = sorted({self.span - (start + j * window) % self.span for j in range(first, k + 1)} - {self.span})
+        heads, head, i = {}, {}, 0
+        for cut in cuts:
+            while i < len(entries) and entries[i][0] - start < cut:
+                key, n = entries[i][1], entries[i][2]
+                head[key] = head.get(key, 0) + n
+                i += 1
+            heads[cut] = dict(head)
+        for j in range(first, k + 1):
+            tick = start + j * window
+            cut = self.span - tick % self.span
+            if cut >= window: self.add(tick, total)
+            else:
+                head = heads[cut]
+                self.add(tick, head)
+                self.add(tick + cut, {key: n - head.get(key, 0) for key, n in total.items()})
+class ProductionStats:
+    def __init__(self, world):
+        self.world = world
+        self.totals = {}
+        self.seconds = Ring(60, LOGIC_TICK_RATE)
+        self.minutes = Ring(60, LOGIC_TICK_RATE * 60)
+        self.hours = Ring(24, LOGIC_TICK_RATE * 3600)
+        self.by_building = Ring(60, LOGIC_TICK_RATE)
+        self.log = None
+    def record(self, event, item_type, count=1, building=None):
+        key = (event, item_type)
+        tick = self.world.tick_count
+        self.totals[key] = self.totals.get(key, 0) + count
+        for ring in (self.seconds, self.minutes, self.hours):
+            bucket = ring.bucket(tick)
+            bucket[key] = bucket.get(key, 0) + count
+        if building is not None:
+            bucket = self.by_building.bucket(tick)
+            bucket[(building, event, item_type)] = bucket.get((building, event, item_type), 0) + count
+        if self.log is not None: self.log.append((tick, key, count, building))
+    def extend(self, start, window, k):
+        log, self.log = self.log, None
+        for _, key, n, _ in log: self.totals[key] = self.totals.get(key, 0) + n * k
+        entries = [(tick, key, n) for tick, key, n, _ in log]
+        for ring in (self.seconds, self.minutes, self.hours): ring.repeat(entries, start, window, k)
+        self.by_building.repeat([(tick, (b, *key), n) for tick, key, n, b in log if b is not None], start, window, k)
+    def produced(self, building, item_type, count=1): self.record("produced", item_type, count, building)
+    def consumed(self, building, item_type, count=1): self.record("consumed", item_type, count, building)
+    def sold(self, building, item_type, value, count=1):
+        self.record("sold", item_type, count, building)
+        self.record("earned", item_type, value * count, building)
+    def _window(self, seconds):
+        tick = self.world.tick_count
+        if seconds <= 60: return self.seconds.total(tick, seconds)
+        if seconds <= 3600: return self.minutes.total(tick, -(-seconds // 60))
+        return self.hours.total(tick, -(-seconds // 3600))
+    def rates(self, event, seconds=60):
+        rates = {}
+        for (e, item_type), n in self._window(seconds).items():
+            if e == event: rates[item_type] = n / seconds
+        return rates
+    def building_rates(self, building, seconds=60):
+        rates = {}
+        for (b, event, item_type), n in self.by_building.total(self.world.tick_count, seconds).items():
+            if b is building: rates[(event, item_type)] = n / seconds
+        return rates
+    def busiest(self, event, item_type, seconds=60):
+        counts = {}
+        for (b, e, t), n in self.by_building.total(self.world.tick_count, seconds).items():
+            if e == event and t == item_type: counts[b] = counts.get(b, 0) + n
+        return sorted(counts.items(), key=lambda kv: -kv[1])
+    def net_rates(self, seconds=60):
+        window = self._window(seconds)
+        net = {}
+        for (event, item_type), n in window.items():
+            if event == "produced": net[item_type] = net.get(item_type, 0) + n / seconds
+            elif event in ("consumed", "sold"): net[item_type] = net.get(item_type, 0) - n / seconds
+        return net
\ No newline at end of file
@@ -0,0 +1,69 @@
+import json
+import time
+from collections import deque
+from config import *
+from gamedata import *
+PHASE_NAMES = ("missions", "buildings", "items")
+def percentile(values, q):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+class Profiler:
+    def __init__(self, window=PROFILE_WINDOW):
+        self.window = window
+        self.clock = time.perf_counter
+        self.ticks = 0
+        self.tick_times = deque(maxlen=window)
+        self.phase_times = {p: deque(maxlen=window) for p in PHASE_NAMES}
+        self.phase_total = dict.fromkeys(PHASE_NAMES, 0.0)
+        self.building_time = {}
+        self.building_calls = {}
+        self.moved = deque(maxlen=window)
+        self.moved_total = 0
+        self.moved_by = {}
+        self.started = self.mark = 0.0
+    def begin(self):
+        self.started = self.mark = self.clock()
+    def phase(self, name):
+        now = self.clock()
+        self.phase_times[name].append(now - self.mark)
+        self.phase_total[name] += now - self.mark
+        self.mark = now
+    def building(self, b, world):
+        t = self.clock()
+        busy = b.tick(world)
+        self.building_time[b.type] = self.building_time.get(b.type, 0.0) + self.clock() - t
+        self.building_calls[b.type] = self.building_calls.get(b.type, 0) + 1
+        return busy
+    def end(self, world):
+        self.tick_times.append(self.clock() - self.started)
+        self.ticks += 1
+        moved = 0
+        for store in (world.items, world.belts):
+            if store is None or not store.trail: continue
+            moved += len(store.trail)
+            for tile in store.trail:
+                b = world.buildings.get(tile)
+                t = b.type if b else None
+                self.moved_by[t] = self.moved_by.get(t, 0) + 1
+            store.trail.clear()
+        self.moved.append(moved)
+        self.moved_total += moved
+    def stats(self):
+        def summary(values):
+            return {"p50_ms": percentile(values, 0.5) * 1000, "p99_ms": percentile(values, 0.99) * 1000,
+                    "mean_ms": sum(values) * 1000 / len(values) if values else 0.0}
+        return {
+            "ticks": self.ticks,
+            "window": len(self.tick_times),
+            "tick": summary(self.tick_times),
+            "phases": {p: dict(summary(self.phase_times[p]), total_ms=self.phase_total[p] * 1000) for p in PHASE_NAMES},
+            "buildings": {t.name: {"total_ms": self.building_time[t] * 1000, "calls": self.building_calls[t],
+                                   "mean_us": self.building_time[t] * 1e6 / self.building_calls[t]}
+                          for t in sorted(self.building_time, key=lambda t: -self.building_time[t])},
+            "items_moved": {"total": self.moved_total, "per_tick": sum(self.moved) / len(self.moved) if self.moved else 0.0,
+                            "buildings": {t.name if t else "GROUND": self.moved_by[t]
+                                          for t in sorted(self.moved_by, key=lambda t: -self.moved_by[t])}},
+        }
+    def dump(self, path):
+        with open(path, "w") as f: json.dump(self.stats(), f, indent=2)
\ No newline at end of file
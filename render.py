@@ -0,0 +1,143 @@
+import os
+try:
+    import pygame
+except ImportError:
+    pygame = None
+from config import *
+from gamedata import *
+from resources import ASSET_DIR, is_lazy
+from simloop import interpolate
+ATLAS_WIDTH = 1024
+ITEM_ICON_SIZE = TILE_SIZE // 2
+SPRITE_FACING = Direction.UP
+def item_image(item_type): return f"{item_type.name.lower()}.png"
+class SpriteAtlas:
+    def __init__(self, asset_dir=ASSET_DIR, tile_size=TILE_SIZE, icon_size=ITEM_ICON_SIZE, resources=None):
+        if pygame is None: raise ImportError("SpriteAtlas requires pygame")
+        self.asset_dir = asset_dir
+        self.resources = resources
+        self.tile_size, self.icon_size = tile_size, icon_size
+        self.images = {}
+        scaled = {}
+        for b_type, data in BUILDING_DATA.items():
+            size = (data["size"][0] * tile_size, data["size"][1] * tile_size)
+            color = ITEM_DATA[BUILDING_TO_ITEM[b_type]]["color"]
+            for active, name in ((False, data["image"]), (True, data.get("image_active", data["image"]))):
+                base = self._load(name, size, color)
+                for d in DIRECTIONS if data["has_dir"] else (SPRITE_FACING,):
+                    scaled[("building", b_type, active, d)] = pygame.transform.rotate(base, (SPRITE_FACING.index - d.index) * 90)
+        for item_type, data in ITEM_DATA.items():
+            if is_lazy(item_image(item_type)): continue
+            scaled[("item", item_type)] = self._load(item_image(item_type), (icon_size, icon_size), data["color"])
+            if "tile_image" in data: scaled[("tile", item_type)] = self._load(data["tile_image"], (tile_size, tile_size), data["color"])
+        scaled[("tile", None)] = self._load("grass_tile.png", (tile_size, tile_size), COLOR_GRASS)
+        self.surface, self.sprites = self._pack(scaled)
+    def _load(self, name, size, color):
+        path = os.path.join(self.asset_dir, name)
+        if name in self.images: image = self.images[name]
+        elif self.resources is not None and self.resources.get(name) is not None: image = self.images[name] = self.resources.get(name)
+        elif os.path.exists(path): image = self.images[name] = pygame.image.load(path)
+        else:
+            fallback = pygame.Surface(size, pygame.SRCALPHA)
+            fallback.fill(color)
+            return fallback
+        return pygame.transform.smoothscale(image, size)
+    def _pack(self, scaled):
+        order = sorted(scaled, key=lambda k: -scaled[k].get_height())
+        rects, x, y, row = {}, 0, 0, 0
+        for key in order:
+            w, h = scaled[key].get_size()
+            if x + w > ATLAS_WIDTH: x, y, row = 0, y + row, 0
+            rects[key] = pygame.Rect(x, y, w, h)
+            x, row = x + w, max(row, h)
+        atlas = pygame.Surface((ATLAS_WIDTH, y + row), pygame.SRCALPHA)
+        for key, rect in rects.items(): atlas.blit(scaled[key], rect.topleft)
+        if pygame.display.get_surface() is not None: atlas = atlas.convert_alpha()
+        return atlas, {key: atlas.subsurface(rect) for key, rect in rects.items()}
+    def building(self, b): return self.building_sprite(b.type, b.direction, b.is_active())
+    def building_sprite(self, b_type, direction, active):
+        return self.sprites[("building", b_type, active, direction if BUILDING_DATA[b_type]["has_dir"] else SPRITE_FACING)]
+    def item(self, item_type): return self.sprites[("item", item_type)]
+    def tile(self, res=None): return self.sprites[("tile", res)]
+class TerrainLayer:
+    def __init__(self, atlas):
+        self.atlas = atlas
+        self.surface = None
+        self.key = None
+        self.origin = (0, 0)
+        self.rebuilds = 0
+    def get(self, world, key=None, lock=None):
+        if key is None: key = (world.min_x, world.min_y, world.max_x, world.max_y, world.terrain_version)
+        if key != self.key:
+            if lock is None: self.rebuild(world)
+            else:
+                with lock: self.rebuild(world)
+            self.key = key
+        return self.surface
+    def rebuild(self, world):
+        ts = self.atlas.tile_size
+        self.origin = (world.min_x, world.min_y)
+        world.tiles.load_rect(world.min_x, world.min_y, world.max_x, world.max_y)
+        self.surface = pygame.Surface(((world.max_x - world.min_x) * ts, (world.max_y - world.min_y) * ts))
+        grass = self.atlas.tile()
+        blits = []
+        for y in range(world.min_y, world.max_y):
+            for x in range(world.min_x, world.max_x):
+                pos = ((x - world.min_x) * ts, (y - world.min_y) * ts)
+                blits.append((grass, pos))
+                res = world.get_tile_resource(x, y)
+                if res: blits.append((self.atlas.tile(res), pos))
+        self.surface.blits(blits, False)
+        self.rebuilds += 1
+class RenderCache:
+    def __init__(self, asset_dir=ASSET_DIR, resources=None):
+        self.atlas = SpriteAtlas(asset_dir, resources=resources)
+        self.terrain = TerrainLayer(self.atlas)
+        self.drawn_buildings = self.drawn_items = 0
+    def visible_rect(self, world, camera_x, camera_y, width, height):
+        ts = self.atlas.tile_size
+        x0, y0 = max(world.min_x, int(camera_x // ts)), max(world.min_y, int(camera_y // ts))
+        x1 = min(world.max_x, int((camera_x + width) // ts) + 1)
+        y1 = min(world.max_y, int((camera_y + height) // ts) + 1)
+        return x0, y0, x1, y1
+    def draw(self, screen, world, camera_x, camera_y):
+        ts, half = self.atlas.tile_size, self.atlas.icon_size // 2
+        width, height = screen.get_size()
+        screen.fill(COLOR_BG)
+        surface = self.terrain.get(world)
+        screen.blit(surface, (self.terrain.origin[0] * ts - camera_x, self.terrain.origin[1] * ts - camera_y))
+        x0, y0, x1, y1 = self.visible_rect(world, camera_x, camera_y, width, height)
+        blits = [(self.atlas.building(b), (b.gx * ts - camera_x, b.gy * ts - camera_y)) for b in world.buildings_in_rect(x0, y0, x1, y1)]
+        self.drawn_buildings = len(blits)
+        item = self.atlas.item
+        for it in world.items.in_rect(x0 - 1, y0 - 1, x1 + 1, y1 + 1):
+            rx, ry = it.get_render_pos()
+            blits.append((item(it.type), (rx - half - camera_x, ry - half - camera_y)))
+        if world.belts is not None:
+            px0, py0, px1, py1 = x0 * ts - half, y0 * ts - half, x1 * ts + half, y1 * ts + half
+            for item_type, rx, ry in zip(*world.belts.render_positions()):
+                if px0 <= rx < px1 and py0 <= ry < py1: blits.append((item(item_type), (rx - half - camera_x, ry - half - camera_y)))
+        self.drawn_items = len(blits) - self.drawn_buildings
+        screen.blits(blits, False)
+    def draw_frame(self, screen, world, frame, camera_x, camera_y, lock=None):
+        prev, cur, alpha = frame
+        ts, half = self.atlas.tile_size, self.atlas.icon_size // 2
+        width, height = screen.get_size()
+        screen.fill(COLOR_BG)
+        surface = self.terrain.get(world, (*cur.bounds, cur.terrain_version), lock)
+        screen.blit(surface, (self.terrain.origin[0] * ts - camera_x, self.terrain.origin[1] * ts - camera_y))
+        x0, y0 = camera_x / ts, camera_y / ts
+        x1, y1 = x0 + width / ts, y0 + height / ts
+        sprite = self.atlas.building_sprite
+        active = cur.active
+        blits = [(sprite(b_type, direction, i in active), (gx * ts - camera_x, gy * ts - camera_y))
+                 for i, (b_type, gx, gy, w, h, direction) in enumerate(cur.buildings) if gx < x1 and gy < y1 and gx + w > x0 and gy + h > y0]
+        self.drawn_buildings = len(blits)
+        item = self.atlas.item
+        px0, py0, px1, py1 = camera_x - half, camera_y - half, camera_x + width + half, camera_y + height + half
+        for item_type, rx, ry in interpolate(prev, cur, alpha):
+            if px0 <= rx < px1 and py0 <= ry < py1: blits.append((item(item_type), (rx - half - camera_x, ry - half - camera_y)))
+        for item_type, rx, ry in cur.lane_items:
+            if px0 <= rx < px1 and py0 <= ry < py1: blits.append((item(item_type), (rx - half - camera_x, ry - half - camera_y)))
+        self.drawn_items = len(blits) - self.drawn_buildings
+        screen.blits(blits, False)
\ No newline at end of file
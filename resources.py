@@ -0,0 +1,112 @@
+import json
+import os
+import struct
+import threading
+import time
+try:
+    import pygame
+except ImportError:
+    pygame = None
+from config import *
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+BUNDLE_PATH = os.path.join(ASSET_DIR, "assets.bundle")
+BUNDLE_MAGIC = b"FBND"
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct("<4sHI")
+LAZY_PREFIXES = ("dimigo_",)
+SPRITE_MAX_SIZE = TILE_SIZE * 2
+PORTRAIT_MAX_SIZE = 256
+def is_lazy(name): return name.startswith(LAZY_PREFIXES)
+def source_signature(asset_dir):
+    sig = []
+    for name in sorted(os.listdir(asset_dir)):
+        if not name.endswith(".png"): continue
+        st = os.stat(os.path.join(asset_dir, name))
+        sig.append([name, st.st_size, st.st_mtime_ns])
+    return sig
+def read_index(path):
+    with open(path, "rb") as f:
+        magic, version, n = BUNDLE_HEADER.unpack(f.read(BUNDLE_HEADER.size))
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION: return None
+        return json.loads(f.read(n).decode("utf-8"))
+def build_bundle(asset_dir=ASSET_DIR, path=BUNDLE_PATH):
+    if pygame is None: raise ImportError("build_bundle requires pygame")
+    sig = source_signature(asset_dir)
+    images, blobs, offset = {}, [], 0
+    for name, _, _ in sig:
+        image = pygame.image.load(os.path.join(asset_dir, name))
+        w, h = image.get_size()
+        limit = PORTRAIT_MAX_SIZE if is_lazy(name) else SPRITE_MAX_SIZE
+        if max(w, h) > limit:
+            scale = limit / max(w, h)
+            image = pygame.image.frombuffer(pygame.image.tostring(image, "RGBA"), (w, h), "RGBA")
+            image = pygame.transform.smoothscale(image, (max(1, round(w * scale)), max(1, round(h * scale))))
+            w, h = image.get_size()
+        data = pygame.image.tostring(image, "RGBA")
+        images[name] = [offset, w, h]
+        blobs.append(data)
+        offset += len(data)
+    index = json.dumps({"sources": sig, "limits": [SPRITE_MAX_SIZE, PORTRAIT_MAX_SIZE], "images": images}).encode("utf-8")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index)))
+        f.write(index)
+        for data in blobs: f.write(data)
+    os.replace(tmp, path)
+    return path
+def ensure_bundle(asset_dir=ASSET_DIR, path=BUNDLE_PATH):
+    index = read_index(path) if os.path.exists(path) else None
+    if index is None or index["sources"] != source_signature(asset_dir) or index.get("limits") != [SPRITE_MAX_SIZE, PORTRAIT_MAX_SIZE]:
+        build_bundle(asset_dir, path)
+    return path
+class ResourceManager:
+    def __init__(self, asset_dir=ASSET_DIR, bundle_path=BUNDLE_PATH):
+        if pygame is None: raise ImportError("ResourceManager requires pygame")
+        self.asset_dir = asset_dir
+        self.bundle_path = bundle_path
+        self.lock = threading.Lock()
+        self.images = {}
+        self.index = {}
+        self.data = None
+        self.base = 0
+        self.thread = None
+        self.timings = {}
+    def open(self):
+        start = time.perf_counter()
+        ensure_bundle(self.asset_dir, self.bundle_path)
+        with open(self.bundle_path, "rb") as f: blob = f.read()
+        _, _, n = BUNDLE_HEADER.unpack_from(blob)
+        self.index = json.loads(blob[BUNDLE_HEADER.size:BUNDLE_HEADER.size + n].decode("utf-8"))["images"]
+        self.data, self.base = memoryview(blob), BUNDLE_HEADER.size + n
+        self.timings["bundle_ms"] = (time.perf_counter() - start) * 1000
+    def _decode(self, name):
+        offset, w, h = self.index[name]
+        start = self.base + offset
+        return pygame.image.frombuffer(self.data[start:start + w * h * 4], (w, h), "RGBA")
+    def load_first_frame(self):
+        if self.data is None: self.open()
+        start = time.perf_counter()
+        for name in self.index:
+            if not is_lazy(name): self.images[name] = self._decode(name)
+        self.timings["decode_ms"] = (time.perf_counter() - start) * 1000
+    def start_background(self):
+        if self.thread is not None: return
+        self.thread = threading.Thread(target=self._load_lazy, name="asset-loader", daemon=True)
+        self.thread.start()
+    def _load_lazy(self):
+        start = time.perf_counter()
+        for name in self.index:
+            if name in self.images: continue
+            image = self._decode(name)
+            with self.lock: self.images.setdefault(name, image)
+        self.timings["background_ms"] = (time.perf_counter() - start) * 1000
+    def wait(self):
+        if self.thread is not None: self.thread.join()
+    def get(self, name):
+        image = self.images.get(name)
+        if image is not None: return image
+        if self.data is None: self.open()
+        if name not in self.index: return None
+        image = self._decode(name)
+        with self.lock: return self.images.setdefault(name, image)
+    def loaded(self, name): return name in self.images
\ No newline at end of file
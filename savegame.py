@@ -0,0 +1,252 @@
+import array
+import io
+import os
+import struct
+import sys
+import threading
+from config import *
+from gamedata import *
+from models import *
+SAVE_MAGIC = b"PTYC"
+SAVE_VERSION = 4
+PREFIX = struct.Struct("<4sH")
+HEADER = struct.Struct("<IIHqI")
+HEADER_V3 = struct.Struct("<HHHqI")
+CHUNK_HEADER = struct.Struct("<II")
+CHUNK_HEADER_V3 = struct.Struct("<HH")
+SCALARS = struct.Struct("<diiiiqid")
+SCALARS_V3 = struct.Struct("<diiiiqiid")
+MISSION_STATUSES = ("pending", "ready", "completed")
+ITEM_CODES = {t.value: t for t in ItemType}
+BUILDING_CODES = {t.value: t for t in BuildingType}
+DIRECTION_CODES = list(Direction)
+MISSION_CODES = {t.value: t for t in MissionType}
+def _write_array(out, typecode, values):
+    a = array.array(typecode, values)
+    if sys.byteorder == "big": a.byteswap()
+    out.write(struct.pack("<I", len(a)))
+    out.write(a.tobytes())
+def _read_array(f, typecode):
+    n, = struct.unpack("<I", f.read(4))
+    a = array.array(typecode)
+    a.frombytes(f.read(n * a.itemsize))
+    if sys.byteorder == "big": a.byteswap()
+    return a
+def _write_str(out, s):
+    data = (s or "").encode("utf-8")
+    out.write(struct.pack("<H", len(data)))
+    out.write(data)
+def _read_str(f):
+    n, = struct.unpack("<H", f.read(2))
+    return f.read(n).decode("utf-8")
+def _chunks(world): return sorted(set(world.tiles.chunks) | set(world.chunk_buildings))
+def _header(world):
+    generator = world.tiles.generator
+    return world.max_width, world.max_height, world.tiles.chunk_size, generator.seed if generator else -1
+def encode_chunk(world, cx, cy):
+    n = world.tiles.chunk_size
+    out = io.BytesIO()
+    out.write(CHUNK_HEADER.pack(cx, cy))
+    out.write(world.tiles.chunks.get((cx, cy)) or bytes(n * n))
+    found = list(world.chunk_buildings.get((cx, cy), ()))
+    _write_array(out, "B", [b.type.value for b in found])
+    _write_array(out, "I", [b.gx for b in found])
+    _write_array(out, "I", [b.gy for b in found])
+    _write_array(out, "B", [b.direction.value for b in found])
+    return out.getvalue()
+def capture_state(world):
+    order = list(world.registry)
+    return {
+        "scalars": (world.money, world.min_x, world.min_y, world.max_x, world.max_y, world.tick_count,
+                    world.research_progress, world.passive_income_per_sec),
+        "research": world.current_research,
+        "techs": tuple(world.unlocked_techs),
+        "upgrades": tuple(world.purchased_upgrades),
+        "missions": tuple(world.missions.items()),
+        "available": tuple(world.available_missions),
+        "buildings": [(b.gx, b.gy, b.timer, getattr(b, "progress", 0), getattr(b, "fuel_left", 0), getattr(b, "max_fuel_time", 0),
+                       getattr(b, "out_index", 0), getattr(b, "active", False), getattr(b, "recipe", None),
+                       getattr(b, "filter_item_type", None), getattr(b, "match_direction_offset", 0),
+                       getattr(b, "no_match_direction_offset", 0)) for b in order],
+        "slots": [tuple((s.item_type, s.count) if s else None for s in inv.slots)
+                  for inv in [b.inv for b in order if hasattr(b, "inv")] + [world.player_inv]],
+        "items": world.items.state_rows(),
+        "lanes": [(seg.tiles[0], seg.length, seg.total, seg.slack, tuple(seg.items), tuple(seg.gaps))
+                  for seg in world.belts.segments] if world.belts is not None else [],
+    }
+def _columns(rows, n): return list(zip(*rows)) if rows else [()] * n
+def pack_state(state):
+    out = io.BytesIO()
+    out.write(SCALARS.pack(*state["scalars"]))
+    _write_str(out, state["research"])
+    out.write(struct.pack("<H", len(state["techs"])))
+    for tech_id in sorted(state["techs"]): _write_str(out, tech_id)
+    _write_array(out, "H", sorted(t.value for t in state["upgrades"]))
+    _write_array(out, "B", [m.value for m, _ in state["missions"]])
+    _write_array(out, "B", [MISSION_STATUSES.index(s) for _, s in state["missions"]])
+    _write_array(out, "B", [m.value for m in state["available"]])
+    gx, gy, timer, progress, fuel, max_fuel, out_index, active, recipe, filters, match, no_match = _columns(state["buildings"], 12)
+    _write_array(out, "I", gx)
+    _write_array(out, "I", gy)
+    _write_array(out, "q", timer)
+    _write_array(out, "q", [int(v) for v in progress])
+    _write_array(out, "q", [int(v) for v in fuel])
+    _write_array(out, "q", [int(v) for v in max_fuel])
+    _write_array(out, "B", out_index)
+    _write_array(out, "B", [bool(v) for v in active])
+    _write_array(out, "H", [r.value if r else 0 for r in recipe])
+    _write_array(out, "H", [f.value if f else 0 for f in filters])
+    _write_array(out, "b", match)
+    _write_array(out, "b", no_match)
+    slots = [s for inv in state["slots"] for s in inv]
+    _write_array(out, "H", [s[0].value if s else 0 for s in slots])
+    _write_array(out, "I", [s[1] if s else 0 for s in slots])
+    uid, types, xs, ys, txs, tys, progress, off_x, off_y, counts = _columns(sorted(state["items"], key=lambda i: i[0]), 10)
+    _write_array(out, "H", [t.value for t in types])
+    _write_array(out, "i", xs)
+    _write_array(out, "i", ys)
+    _write_array(out, "i", txs)
+    _write_array(out, "i", tys)
+    _write_array(out, "d", progress)
+    _write_array(out, "d", off_x)
+    _write_array(out, "d", off_y)
+    _write_array(out, "H", counts)
+    heads, lengths, totals, slacks, seg_items, seg_gaps = _columns(state["lanes"], 6)
+    _write_array(out, "I", [h[0] for h in heads])
+    _write_array(out, "I", [h[1] for h in heads])
+    _write_array(out, "I", lengths)
+    _write_array(out, "d", totals)
+    _write_array(out, "I", slacks)
+    _write_array(out, "I", [len(items) for items in seg_items])
+    _write_array(out, "H", [t.value for items in seg_items for t in items])
+    _write_array(out, "d", [gap for gaps in seg_gaps for gap in gaps])
+    return out.getvalue()
+def encode_state(world): return pack_state(capture_state(world))
+def _write_save(f, header, chunks, state):
+    f.write(PREFIX.pack(SAVE_MAGIC, SAVE_VERSION))
+    f.write(HEADER.pack(*header, len(chunks)))
+    for data in chunks: f.write(data)
+    f.write(state)
+def save_world(world, path):
+    chunks = [encode_chunk(world, cx, cy) for cx, cy in _chunks(world)]
+    if hasattr(path, "write"): _write_save(path, _header(world), chunks, encode_state(world))
+    else:
+        with open(path, "wb") as f: _write_save(f, _header(world), chunks, encode_state(world))
+def load_world(path, item_store=None, transport=None, crafting_timers=False, tile_capacity=None):
+    if not hasattr(path, "read"):
+        with open(path, "rb") as f: return load_world(f, item_store, transport, crafting_timers, tile_capacity)
+    f = path
+    magic, version = PREFIX.unpack(f.read(PREFIX.size))
+    if magic != SAVE_MAGIC: raise ValueError("not a save file")
+    if version not in (2, 3, SAVE_VERSION): raise ValueError(f"unsupported save version {version}")
+    wide = version >= 4
+    header, chunk_header = (HEADER, CHUNK_HEADER) if wide else (HEADER_V3, CHUNK_HEADER_V3)
+    coord, pos = ("I", "i") if wide else ("H", "h")
+    width, height, chunk_size, seed, chunk_count = header.unpack(f.read(header.size))
+    if chunk_size != CHUNK_SIZE: raise ValueError(f"save uses {chunk_size}x{chunk_size} chunks, expected {CHUNK_SIZE}")
+    generator = None
+    if seed >= 0:
+        from mapgen import ChunkGenerator
+        generator = ChunkGenerator(seed)
+    world = World(item_store=item_store, transport=transport, crafting_timers=crafting_timers, generate=False,
+                  width=width, height=height, generator=generator, tile_capacity=tile_capacity)
+    for _ in range(chunk_count):
+        cx, cy = chunk_header.unpack(f.read(chunk_header.size))
+        world.tiles.chunks[(cx, cy)] = bytearray(f.read(chunk_size * chunk_size))
+        types, gxs, gys, dirs = _read_array(f, "B"), _read_array(f, coord), _read_array(f, coord), _read_array(f, "B")
+        for t, gx, gy, d in zip(types, gxs, gys, dirs):
+            b = Building(BUILDING_CODES[t], gx, gy, DIRECTION_CODES[d])
+            for y in range(gy, gy + b.height):
+                for x in range(gx, gx + b.width): world.buildings[(x, y)] = b
+    world.resource_index.rebuild(world.tiles)
+    scalars = SCALARS.unpack(f.read(SCALARS.size)) if wide else SCALARS_V3.unpack(f.read(SCALARS_V3.size))
+    if not wide: scalars = scalars[:6] + scalars[7:]
+    (world.money, world.min_x, world.min_y, world.max_x, world.max_y, world.tick_count,
+     world.research_progress, world.passive_income_per_sec) = scalars
+    world.current_research = _read_str(f) or None
+    n, = struct.unpack("<H", f.read(2))
+    world.unlocked_techs = {_read_str(f) for _ in range(n)}
+    world.purchased_upgrades = {ITEM_CODES[c] for c in _read_array(f, "H")}
+    ids, statuses = _read_array(f, "B"), _read_array(f, "B")
+    world.missions = {MISSION_CODES[m]: MISSION_STATUSES[s] for m, s in zip(ids, statuses)}
+    world.available_missions = [MISSION_CODES[m] for m in _read_array(f, "B")]
+    world._track_missions()
+    gxs, gys = _read_array(f, coord), _read_array(f, coord)
+    timers, progress, fuel, max_fuel = _read_array(f, "q"), _read_array(f, "q"), _read_array(f, "q"), _read_array(f, "q")
+    out_index, active, recipes, filters = _read_array(f, "B"), _read_array(f, "B"), _read_array(f, "H"), _read_array(f, "H")
+    match, no_match = _read_array(f, "b"), _read_array(f, "b")
+    order = []
+    belts, world.belts = world.belts, None
+    for k, (gx, gy) in enumerate(zip(gxs, gys)):
+        b = world.buildings[(gx, gy)]
+        world.place_building(b)
+        b.timer = timers[k]
+        if b.type == BuildingType.SMELTER: b.fuel_left, b.max_fuel_time = fuel[k], max_fuel[k]
+        elif b.type == BuildingType.SPLITTER: b.out_index = out_index[k]
+        elif b.type == BuildingType.ASSEMBLER: b.recipe = ITEM_CODES.get(recipes[k])
+        elif b.type == BuildingType.LAB: b.active = bool(active[k])
+        elif b.type == BuildingType.CLASSIFIER:
+            b.filter_item_type = ITEM_CODES.get(filters[k])
+            b.match_direction_offset, b.no_match_direction_offset = match[k], no_match[k]
+        if b.type in (BuildingType.SMELTER, BuildingType.ASSEMBLER, BuildingType.LAB): b.progress = progress[k]
+        if hasattr(b, "inv"): order.append(b.inv)
+    codes, counts = _read_array(f, "H"), _read_array(f, "I")
+    k = 0
+    for inv in order + [world.player_inv]:
+        n = len(inv.slots)
+        inv.slots = [ItemStack(ITEM_CODES[c], counts[k + i]) if c else None for i, c in enumerate(codes[k:k + n])]
+        k += n
+    types, xs, ys, txs, tys = _read_array(f, "H"), _read_array(f, pos), _read_array(f, pos), _read_array(f, pos), _read_array(f, pos)
+    progress, off_x, off_y = _read_array(f, "d"), _read_array(f, "d"), _read_array(f, "d")
+    stacks = _read_array(f, "H") if version >= 3 else [1] * len(types)
+    for k, t in enumerate(types):
+        for n in ([stacks[k]] if world.stacking else [1] * stacks[k]):
+            item = ItemEntity(ITEM_CODES[t], xs[k], ys[k], (off_x[k], off_y[k]))
+            item.target_x, item.target_y, item.progress, item.count = txs[k], tys[k], progress[k], n
+            world.items.add(item)
+    hxs, hys, lengths, totals = _read_array(f, coord), _read_array(f, coord), _read_array(f, coord), _read_array(f, "d")
+    slacks, sizes, types, gaps = _read_array(f, "I"), _read_array(f, "I"), _read_array(f, "H"), _read_array(f, "d")
+    records, k = [], 0
+    for hx, hy, length, total, slack, n in zip(hxs, hys, lengths, totals, slacks, sizes):
+        records.append(((hx, hy), length, [ITEM_CODES[t] for t in types[k:k + n]], gaps[k:k + n], total, slack))
+        k += n
+    world.belts = belts
+    if belts is None: _drop_lanes(world, records)
+    elif records: belts.restore(world, records)
+    else:
+        for b in world.registry:
+            if b.type in BELT_TYPES: belts.add_tile(world, b.gx, b.gy)
+    world.dirty_chunks.clear()
+    return world
+def _drop_lanes(world, records):
+    for (hx, hy), length, items, gaps, total, slack in records:
+        dx, dy = world.buildings[(hx, hy)].direction.to_vector()
+        d = 0.0
+        for item_type, gap in zip(items, gaps):
+            d += gap
+            i = min(int(length - d), length - 1)
+            world.items.add(ItemEntity(item_type, hx + dx * i, hy + dy * i))
+class Autosaver:
+    def __init__(self, world, path):
+        self.world = world
+        self.path = path
+        self.chunks = {}
+        self.thread = None
+    def save(self):
+        if self.thread and self.thread.is_alive(): return False
+        world = self.world
+        keys = _chunks(world)
+        for key in keys:
+            if key in world.dirty_chunks or key not in self.chunks: self.chunks[key] = encode_chunk(world, *key)
+        world.dirty_chunks.clear()
+        chunks = [self.chunks[key] for key in keys]
+        self.thread = threading.Thread(target=self._write, args=(_header(world), chunks, capture_state(world)), daemon=True)
+        self.thread.start()
+        return True
+    def _write(self, header, chunks, state):
+        state = pack_state(state)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f: _write_save(f, header, chunks, state)
+        os.replace(tmp, self.path)
+    def wait(self):
+        if self.thread: self.thread.join()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import threading
+import time
+from queue import Empty, SimpleQueue
+from config import *
+from gamedata import *
+from models import Building
+MAX_CATCHUP_TICKS = 5
+class Snapshot:
+    __slots__ = ("tick", "time", "money", "bounds", "terrain_version", "building_version", "buildings", "animated", "active",
+                 "items", "lane_items")
+    def __init__(self, world, now, prev=None):
+        self.tick = world.tick_count
+        self.time = now
+        self.money = world.money
+        self.bounds = (world.min_x, world.min_y, world.max_x, world.max_y)
+        self.terrain_version = world.terrain_version
+        self.building_version = world.building_version
+        if prev is not None and prev.building_version == world.building_version:
+            self.buildings, self.animated = prev.buildings, prev.animated
+        else:
+            self.buildings = tuple((b.type, b.gx, b.gy, b.width, b.height, b.direction) for b in world.registry)
+            self.animated = tuple((i, b) for i, b in enumerate(world.registry) if type(b).is_active is not Building.is_active)
+        self.active = frozenset(i for i, b in self.animated if b.is_active())
+        self.items = world.items.raw_positions()
+        self.lane_items = tuple(zip(*world.belts.render_positions())) if world.belts is not None else ()
+def render_pos(x, y, tx, ty, progress, off_x, off_y):
+    return (x + (tx - x) * progress) * TILE_SIZE + TILE_SIZE // 2 + off_x, (y + (ty - y) * progress) * TILE_SIZE + TILE_SIZE // 2 + off_y
+def interpolate(prev, cur, alpha):
+    old = prev.items if prev is not None else {}
+    out = []
+    for uid, (item_type, *raw) in cur.items.items():
+        x, y = render_pos(*raw)
+        p = old.get(uid)
+        if p is not None:
+            px, py = render_pos(*p[1:])
+            x, y = px + (x - px) * alpha, py + (y - py) * alpha
+        out.append((item_type, x, y))
+    return out
+class SimulationDriver:
+    def __init__(self, world, rate=LOGIC_TICK_RATE, clock=time.perf_counter):
+        self.world = world
+        self.dt = 1.0 / rate
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.commands = SimpleQueue()
+        self.buffers = (None, Snapshot(world, clock()))
+        self.thread = None
+        self.running = False
+        self.ticks = self.dropped = 0
+        self.max_tick = 0.0
+    def submit(self, fn, *args): self.commands.put((fn, args))
+    def _drain(self):
+        while True:
+            try: fn, args = self.commands.get_nowait()
+            except Empty: return
+            fn(*args)
+    def step(self, now=None):
+        start = self.clock()
+        with self.lock:
+            self._drain()
+            self.world.tick()
+            snap = Snapshot(self.world, start if now is None else now, self.buffers[1])
+        self.buffers = (self.buffers[1], snap)
+        self.ticks += 1
+        self.max_tick = max(self.max_tick, self.clock() - start)
+        return snap
+    def run(self):
+        next_tick = self.clock()
+        while self.running:
+            now = self.clock()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                continue
+            behind = int((now - next_tick) / self.dt)
+            if behind > MAX_CATCHUP_TICKS:
+                next_tick += (behind - MAX_CATCHUP_TICKS) * self.dt
+                self.dropped += behind - MAX_CATCHUP_TICKS
+            self.step(next_tick)
+            next_tick += self.dt
+    def start(self):
+        if self.thread is not None: return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+    def stop(self):
+        self.running = False
+        if self.thread is not None: self.thread.join()
+        self.thread = None
+    def frame(self, now=None):
+        prev, cur = self.buffers
+        now = self.clock() if now is None else now
+        return prev, cur, min(1.0, max(0.0, (now - cur.time) / self.dt))
\ No newline at end of file
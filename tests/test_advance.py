@@ -0,0 +1,39 @@
+import bench
+from models import *
+def smelting_line(**engine):
+    world = World(generate=False, **engine)
+    x, y = world.min_x, world.min_y + 4
+    bench.build(world, BuildingType.MINER, x, y, Direction.RIGHT, ItemType.IRON_ORE)
+    for i in range(1, 4): bench.build(world, BuildingType.CONVEYOR, x + i, y, Direction.RIGHT)
+    bench.build(world, BuildingType.MINER, x + 4, y - 2, Direction.DOWN, ItemType.WOOD)
+    bench.build(world, BuildingType.CONVEYOR, x + 4, y - 1, Direction.DOWN)
+    bench.build(world, BuildingType.SMELTER, x + 4, y, Direction.RIGHT)
+    for i in range(5, 7): bench.build(world, BuildingType.CONVEYOR, x + i, y, Direction.RIGHT)
+    bench.build(world, BuildingType.SELL_NODE, x + 7, y)
+    return world
+def rates(world):
+    stats = world.production
+    return [stats.rates(event, seconds) for event in ("produced", "consumed", "sold") for seconds in (1, 60, 600, 3600)]
+def check_advance(seconds, **engine):
+    fast, exact = smelting_line(**engine), smelting_line(**engine)
+    ticked = []
+    tick = fast.tick
+    fast.tick = lambda: ticked.append(tick())
+    fast.advance(seconds)
+    for _ in range(int(round(seconds * LOGIC_TICK_RATE))): exact.tick()
+    assert len(ticked) < exact.tick_count
+    assert fast.tick_count == exact.tick_count
+    assert fast.money == exact.money
+    assert fast.production.totals == exact.production.totals
+    assert rates(fast) == rates(exact)
+    for _ in range(LOGIC_TICK_RATE * 10):
+        tick()
+        exact.tick()
+    assert fast.money == exact.money
+    assert [b.progress for b in fast.registry if b.type == BuildingType.SMELTER] == \
+           [b.progress for b in exact.registry if b.type == BuildingType.SMELTER]
+def test_advance_keeps_tick_count():
+    check_advance(600)
+    check_advance(601.5)
+def test_advance_shifts_crafting_timers():
+    check_advance(600, crafting_timers=True)
\ No newline at end of file
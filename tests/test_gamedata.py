@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXTRA = {
+    "items": {"STEEL": {"id": 50, "name": "강철", "color": [90, 90, 110], "value": 40, "fuel_value": 0, "desc": "테스트"}},
+    "smelter_recipes": {"IRON_INGOT": {"output": "STEEL", "time": 90}},
+    "assembler_recipes": {"STEEL": {"inputs": {"IRON_INGOT": 2}, "time": 60}},
+}
+PROBE = """
+from gamedata import *
+steel = ItemType.STEEL
+print(json.dumps([ITEM_VALUE[steel.index], SMELTER_OUTPUT[ItemType.IRON_INGOT.index].name, SMELTER_TIME[ItemType.IRON_INGOT.index],
+                  [t.name for t in RECIPE_INPUTS[steel.index]], ITEM_DATA[steel]["color"], GAMEDATA_PATH]))
+"""
+def test_data_file_from_environment(tmp_path):
+    path = tmp_path / "extra.json"
+    path.write_text(json.dumps(EXTRA), encoding="utf-8")
+    env = dict(os.environ, GAMEDATA_PATH=str(path))
+    proc = subprocess.run([sys.executable, "-c", "import json" + PROBE], cwd=ROOT, env=env, check=True, capture_output=True, text=True)
+    assert json.loads(proc.stdout) == [40, "STEEL", 90, ["IRON_INGOT"], [90, 90, 110], str(path)]
+def test_default_data_file_is_optional():
+    env = {k: v for k, v in os.environ.items() if k != "GAMEDATA_PATH"}
+    code = "from gamedata import *; print(GAMEDATA_PATH, 'STEEL' in ItemType.__members__)"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True, text=True)
+    expected = os.path.join(ROOT, "gamedata.json") if os.path.exists(os.path.join(ROOT, "gamedata.json")) else "None"
+    assert proc.stdout.split() == [expected, "False"]
\ No newline at end of file
@@ -0,0 +1,38 @@
+import bench
+from models import *
+def full_smelter(world):
+    smelter = bench.build(world, BuildingType.SMELTER, world.min_x + 4, world.min_y + 4, Direction.RIGHT)
+    smelter.inv.add_item_to_slot(0, ItemType.IRON_ORE, ITEM_STACK_SIZE)
+    return smelter
+def test_items_behind_full_smelter_sleep():
+    world = World(generate=False)
+    smelter = full_smelter(world)
+    for _ in range(200): world.add_item(ItemEntity(ItemType.IRON_ORE, smelter.gx, smelter.gy))
+    for _ in range(LOGIC_TICK_RATE): world.tick()
+    assert len(world.items) == 200
+    assert len(world.items.active) == 0
+    smelter.inv.remove_from_slot(0, 1)
+    world.tick()
+    assert len(world.items) == 199
+    assert smelter.inv.count_items(ItemType.IRON_ORE) == ITEM_STACK_SIZE
+    assert len(world.items.active) == 0
+def test_active_items_stay_bounded_behind_a_full_smelter():
+    world = World(generate=False)
+    smelter = full_smelter(world)
+    bench.build(world, BuildingType.MINER, smelter.gx - 4, smelter.gy, Direction.RIGHT, ItemType.IRON_ORE)
+    for x in range(smelter.gx - 3, smelter.gx): bench.build(world, BuildingType.CONVEYOR, x, smelter.gy, Direction.RIGHT)
+    peak = 0
+    for _ in range(LOGIC_TICK_RATE * 60):
+        world.tick()
+        peak = max(peak, len(world.items.active))
+    assert len(world.items.at(smelter.gx, smelter.gy)) > 20
+    assert peak <= 5
+def test_array_store_parks_items_behind_a_full_smelter():
+    world = World(item_store="array", generate=False)
+    smelter = full_smelter(world)
+    for _ in range(50): world.add_item(ItemEntity(ItemType.IRON_ORE, smelter.gx, smelter.gy))
+    world.tick()
+    assert world.items.asleep[:world.items.n].all()
+    smelter.inv.remove_from_slot(0, 1)
+    world.tick()
+    assert len(world.items) == 49
\ No newline at end of file
@@ -0,0 +1,17 @@
+import pytest
+import bench
+from models import *
+def profile(ticks, **engine):
+    world = bench.make_world("full", 0, **engine)
+    prof = world.enable_profiling(ticks)
+    for _ in range(ticks): world.tick()
+    return prof.stats()["items_moved"]
+def test_items_moved_split_by_building_type():
+    moved = profile(60)
+    assert moved["total"] > 0
+    assert sum(moved["buildings"].values()) == moved["total"]
+    assert set(moved["buildings"]) <= {t.name for t in BuildingType} | {"GROUND"}
+    assert "CONVEYOR" in moved["buildings"]
+def test_array_store_reports_the_same_split():
+    pytest.importorskip("numpy")
+    assert profile(60, item_store="array") == profile(60)
\ No newline at end of file
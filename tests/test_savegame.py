@@ -0,0 +1,42 @@
+import io
+import bench
+import savegame
+from models import *
+def large_world(**engine):
+    world = World(generate=False, width=100000, height=70000, **engine)
+    bench.unlock_all(world)
+    x, y = 99990, 69990
+    bench.build(world, BuildingType.MINER, x, y, Direction.RIGHT, ItemType.IRON_ORE)
+    for i in range(1, 6): bench.build(world, BuildingType.CONVEYOR, x + i, y, Direction.RIGHT)
+    bench.build(world, BuildingType.SELL_NODE, x + 6, y)
+    world.add_item(ItemEntity(ItemType.COAL_ORE, 34996, 40000))
+    world.add_item(ItemEntity(ItemType.WOOD, x + 2, y))
+    return world
+def state(world):
+    items = sorted((i.type.name, i.x, i.y, i.target_x, i.target_y, round(i.progress, 9)) for i in world.items)
+    buildings = sorted((b.type.name, b.gx, b.gy, b.direction.name, b.timer) for b in world.registry)
+    return world.max_width, world.max_height, world.tick_count, world.money, items, buildings
+def round_trip(world, **engine):
+    buf = io.BytesIO()
+    savegame.save_world(world, buf)
+    buf.seek(0)
+    return savegame.load_world(buf, **engine)
+def test_large_world_round_trip():
+    world = large_world()
+    for _ in range(100): world.tick()
+    loaded = round_trip(world)
+    assert state(loaded) == state(world)
+    for _ in range(100):
+        world.tick()
+        loaded.tick()
+    assert state(loaded) == state(world)
+def test_large_world_round_trip_with_lanes():
+    world = large_world(transport="lanes")
+    for _ in range(100): world.tick()
+    loaded = round_trip(world, transport="lanes")
+    assert state(loaded) == state(world)
+    for _ in range(100):
+        world.tick()
+        loaded.tick()
+    assert state(loaded) == state(world)
+    assert loaded.money > 500
\ No newline at end of file
@@ -0,0 +1,142 @@
+import argparse
+import hashlib
+import json
+import sys
+from config import *
+from gamedata import *
+import bench
+FIELDS = ("money", "research", "missions", "player_inv", "timer", "progress", "fuel_left", "out_index", "active",
+          "recipe", "filter", "inventory", "items", "lanes")
+BUILDING_FIELDS = {"timer": "timer", "progress": "progress", "fuel_left": "fuel_left", "out_index": "out_index",
+                   "active": "active", "recipe": "recipe", "filter": "filter_item_type"}
+ENGINE_KEYS = ("item_store", "transport", "crafting_timers", "tile_capacity")
+def _value(v):
+    if isinstance(v, float): return round(v, 9)
+    return v.name if hasattr(v, "name") else v
+def _slots(inv): return tuple((s.item_type.name, s.count) if s else None for s in inv.slots)
+def state(world):
+    buildings = sorted(world.registry, key=lambda b: (b.gx, b.gy))
+    out = {
+        "money": [("money", round(world.money, 6))],
+        "research": [("progress", world.research_progress), ("current", _value(world.current_research)),
+                     ("unlocked", tuple(sorted(map(_value, world.unlocked_techs))))],
+        "missions": sorted((_value(m), _value(s)) for m, s in world.missions.items()),
+        "player_inv": [("slots", _slots(world.player_inv))],
+    }
+    for field, attr in BUILDING_FIELDS.items():
+        out[field] = [((b.type.name, b.gx, b.gy), _value(getattr(b, attr))) for b in buildings if hasattr(b, attr)]
+    out["inventory"] = [((b.type.name, b.gx, b.gy), _slots(b.inv)) for b in buildings if hasattr(b, "inv")]
+    tiles = {}
+    for item in world.items:
+        units = tiles.setdefault((item.x, item.y), {})
+        key = (item.type.name, item.target_x, item.target_y, round(item.progress, 9))
+        units[key] = units.get(key, 0) + item.count
+    out["items"] = sorted((k, tuple(sorted(v.items()))) for k, v in tiles.items())
+    lanes = []
+    if world.belts is not None:
+        for seg in world.belts.segments:
+            if seg.items: lanes.append((seg.tiles[0], tuple((t.name, round(d, 9)) for t, d in seg.positions())))
+    out["lanes"] = sorted(lanes)
+    return out
+def digest(st): return [hashlib.blake2b(repr(st[f]).encode(), digest_size=8).hexdigest() for f in FIELDS]
+def engine_kwargs(engine): return {k: engine[k] for k in ENGINE_KEYS if engine.get(k) is not None}
+def record(scenario, ticks, seed=0, **engine):
+    world = bench.make_world(scenario, seed, **engine_kwargs(engine))
+    hashes = []
+    for _ in range(ticks):
+        world.tick()
+        hashes.append(digest(state(world)))
+    return {"scenario": scenario, "seed": seed, "ticks": ticks, "engine": engine_kwargs(engine), "fields": list(FIELDS), "hashes": hashes}
+def save_trace(trace, path):
+    with open(path, "w") as f: json.dump(trace, f)
+def load_trace(path):
+    with open(path) as f: trace = json.load(f)
+    if trace["fields"] != list(FIELDS): raise ValueError(f"trace fields {trace['fields']} do not match {list(FIELDS)}")
+    return trace
+def first_difference(a, b):
+    a, b = dict(a), dict(b)
+    for key in sorted(set(a) | set(b), key=repr):
+        if a.get(key) != b.get(key): return key, a.get(key), b.get(key)
+    return None
+class Divergence:
+    def __init__(self, tick, fields, details=None):
+        self.tick = tick
+        self.fields = fields
+        self.details = details or {}
+    def __str__(self):
+        lines = [f"diverged at tick {self.tick}: {', '.join(self.fields)}"]
+        for field, (key, ref, got) in self.details.items(): lines.append(f"  {field} {key}: reference {ref!r}, candidate {got!r}")
+        return "\n".join(lines)
+def replay(trace, **engine):
+    world = bench.make_world(trace["scenario"], trace["seed"], **engine_kwargs(engine))
+    for tick, expected in enumerate(trace["hashes"], 1):
+        world.tick()
+        got = digest(state(world))
+        if got != expected:
+            fields = [f for f, a, b in zip(FIELDS, expected, got) if a != b]
+            return Divergence(tick, fields)
+    return None
+def diff(scenario, ticks, seed=0, reference=None, candidate=None):
+    ref = bench.make_world(scenario, seed, **engine_kwargs(reference or {}))
+    cand = bench.make_world(scenario, seed, **engine_kwargs(candidate or {}))
+    for tick in range(1, ticks + 1):
+        ref.tick()
+        cand.tick()
+        a, b = state(ref), state(cand)
+        fields = [f for f in FIELDS if a[f] != b[f]]
+        if fields: return Divergence(tick, fields, {f: first_difference(a[f], b[f]) for f in fields})
+    return None
+def add_engine_args(parser, prefix=""):
+    parser.add_argument(f"--{prefix}item-store", choices=["object", "array"], default="object")
+    parser.add_argument(f"--{prefix}transport", choices=["items", "lanes", "stacks"], default="items")
+    parser.add_argument(f"--{prefix}crafting-timers", action="store_true")
+    parser.add_argument(f"--{prefix}tile-capacity", type=int, metavar="N")
+def read_engine(args, prefix=""):
+    get = lambda name: getattr(args, prefix.replace("-", "_") + name)
+    return {"item_store": None if get("item_store") == "object" else get("item_store"),
+            "transport": None if get("transport") == "items" else get("transport"),
+            "crafting_timers": get("crafting_timers") or None, "tile_capacity": get("tile_capacity")}
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="per-tick world state traces for checking alternative tick engines")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("record", help="hash the state after every tick and write the trace")
+    p.add_argument("scenario", choices=list(bench.SCENARIOS))
+    p.add_argument("output")
+    p.add_argument("--ticks", type=int, default=LOGIC_TICK_RATE * 20)
+    p.add_argument("--seed", type=int, default=0)
+    add_engine_args(p)
+    p = sub.add_parser("check", help="replay a recorded trace on an engine and report the first diverging tick")
+    p.add_argument("trace")
+    p.add_argument("--explain", action="store_true", help="on divergence, rerun the recorded engine alongside to show the differing values")
+    add_engine_args(p)
+    p = sub.add_parser("diff", help="run the reference engine and a candidate in lockstep")
+    p.add_argument("scenarios", nargs="*", help=f"any of: {', '.join(bench.SCENARIOS)} (default: all)")
+    p.add_argument("--ticks", type=int, default=LOGIC_TICK_RATE * 20)
+    p.add_argument("--seed", type=int, default=0)
+    add_engine_args(p)
+    add_engine_args(p, "ref-")
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        trace = record(args.scenario, args.ticks, args.seed, **read_engine(args))
+        save_trace(trace, args.output)
+        print(f"[{args.scenario}] recorded {args.ticks} ticks to {args.output}")
+        return 0
+    if args.command == "check":
+        trace = load_trace(args.trace)
+        engine = read_engine(args)
+        result = replay(trace, **engine)
+        if result and args.explain: result = diff(trace["scenario"], result.tick, trace["seed"], trace["engine"], engine) or result
+        if result is None:
+            print(f"[{trace['scenario']}] {trace['ticks']} ticks match")
+            return 0
+        print(f"[{trace['scenario']}] {result}")
+        return 1
+    failed = False
+    for name in args.scenarios or list(bench.SCENARIOS):
+        if name not in bench.SCENARIOS: parser.error(f"unknown scenario: {name}")
+        result = diff(name, args.ticks, args.seed, read_engine(args, "ref-"), read_engine(args))
+        print(f"[{name}] {result if result else f'{args.ticks} ticks match'}")
+        failed = failed or result is not None
+    return 1 if failed else 0
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file